@@ -1,9 +1,14 @@
 import os
-import shutil
 from datetime import datetime
+from case_database import CaseWriter
+from scan_rules import NO_RULES, walk_files
+from scan_checkpoint import CheckpointJournal, has_checkpoint
+from io_scheduler import get_scheduler
 
 REPORT_DIR = r"C:\Users\sohai\Desktop\DF_REPORTS"
 LOG_FILE = os.path.join(REPORT_DIR, "collection_log.txt")
+CASE_MODULE = "Artifact Collection"
+PARTIAL_SUFFIX = ".partial"  # Copies are written under this suffix and renamed once complete
 
 def create_report_directory():
     """Ensure the DF_REPORTS directory exists."""
@@ -36,46 +41,105 @@ def generate_report(source_dir, destination_dir, collected_count, timestamp, log
     # ✅ Return summary for report_generator.py
     return report_data
 
-def collect_artifacts(source_dir, destination_dir):
-    """Collect forensic artifacts with logging and reporting."""
+def collect_artifacts(source_dir, destination_dir, resume=False, rules=NO_RULES):
+    """Collect forensic artifacts with logging and reporting.
+
+    Every copied file is journaled; with resume=True an interrupted collection
+    continues into its original artifact folder and skips files already copied.
+    Copies run on the shared I/O scheduler's workers.
+    """
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     artifact_dir = os.path.join(destination_dir, f"artifacts_{timestamp}")
+    journal = CheckpointJournal("collection", source_dir, resume=resume,
+                                meta={"artifact_dir": artifact_dir, "timestamp": timestamp})
+    artifact_dir = journal.meta["artifact_dir"]
+    timestamp = journal.meta["timestamp"]
     os.makedirs(artifact_dir, exist_ok=True)
+    if resume:
+        # Copies cut off by the interruption are redone from scratch
+        for name in os.listdir(artifact_dir):
+            if name.endswith(PARTIAL_SUFFIX):
+                os.remove(os.path.join(artifact_dir, name))
 
     collected_count = 0
     log_entries = []
+    scheduler = get_scheduler()
+    # Destinations handed out so far; journaled ones are reserved up front so a resumed
+    # run plans the same names and overwrites unjournaled copies instead of duplicating them
+    reserved = set(journal.completed.values())
+
+    def is_taken(path):
+        # A fresh run never overwrites; on resume, unreserved files are this run's own earlier copies
+        return path in reserved or (not resume and os.path.exists(path))
+
+    def plan_copies():
+        """Pick a unique destination for every file; runs in this thread so names cannot clash."""
+        for entry in walk_files(source_dir, rules):
+            if entry.path in journal.completed:
+                yield entry, None
+                continue
+
+            file = entry.name
+            destination_path = os.path.join(artifact_dir, file)
+
+            # Handle duplicate filenames
+            if is_taken(destination_path):
+                base, ext = os.path.splitext(file)
+                counter = 1
+                while is_taken(destination_path):
+                    new_file = f"{base}_{counter}{ext}"
+                    destination_path = os.path.join(artifact_dir, new_file)
+                    counter += 1
+            reserved.add(destination_path)
+            yield entry, destination_path
+
+    def copy_artifact(job):
+        entry, destination_path = job
+        if destination_path is None:
+            return entry, journal.completed[entry.path], None, True
+        partial_path = destination_path + PARTIAL_SUFFIX
+        try:
+            # A crash mid-copy leaves only a .partial file, never a torn artifact under the real name
+            scheduler.copy_file(entry.path, partial_path)
+            os.replace(partial_path, destination_path)
+            return entry, destination_path, None, False
+        except Exception as e:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            return entry, destination_path, e, False
 
     create_report_directory()
 
     try:
-        with open(LOG_FILE, "a", encoding='utf-8') as log_file:
+        with open(LOG_FILE, "a", encoding='utf-8') as log_file, CaseWriter(CASE_MODULE, scope_root=source_dir) as case:
             log_file.write(f"\n[LOG] Artifact Collection - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-
-            for root, _, files in os.walk(source_dir):
-                for file in files:
-                    source_path = os.path.join(root, file)
-                    destination_path = os.path.join(artifact_dir, file)
-
-                    # Handle duplicate filenames
-                    if os.path.exists(destination_path):
-                        base, ext = os.path.splitext(file)
-                        counter = 1
-                        while os.path.exists(destination_path):
-                            new_file = f"{base}_{counter}{ext}"
-                            destination_path = os.path.join(artifact_dir, new_file)
-                            counter += 1
-
-                    try:
-                        shutil.copy2(source_path, destination_path)
-                        collected_count += 1
-                        msg = f"[INFO] Collected: {destination_path}"
-                        log_file.write(msg + "\n")
-                        log_entries.append(msg)
-                    except Exception as e:
-                        error_msg = f"[ERROR] Failed to collect {file}: {e}"
-                        log_file.write(error_msg + "\n")
-                        log_entries.append(error_msg)
-
+            if journal.completed:
+                log_file.write(f"[INFO] Resuming collection: {len(journal.completed)} files already collected\n")
+
+            for entry, destination_path, error, resumed in scheduler.map(copy_artifact, plan_copies()):
+                source_path = entry.path
+
+                # Merge files collected before the interruption without copying them again
+                if resumed:
+                    collected_count += 1
+                    log_entries.append(f"[INFO] Collected: {destination_path}")
+                    case.add_finding("COLLECTED", source_path, destination_path)
+                    continue
+
+                if error is None:
+                    collected_count += 1
+                    msg = f"[INFO] Collected: {destination_path}"
+                    log_file.write(msg + "\n")
+                    log_entries.append(msg)
+                    case.add_finding("COLLECTED", source_path, destination_path)
+                    journal.record(source_path, destination_path)
+                else:
+                    error_msg = f"[ERROR] Failed to collect {entry.name}: {error}"
+                    log_file.write(error_msg + "\n")
+                    log_entries.append(error_msg)
+            log_file.write(f"[INFO] {scheduler.summary()}\n")
+
+        journal.finish()
         report_data = generate_report(source_dir, artifact_dir, collected_count, timestamp, log_entries)
 
         print(f"\n✅ Artifact collection completed successfully!")
@@ -83,7 +147,11 @@ def collect_artifacts(source_dir, destination_dir):
         print(f"   → Log file updated at: {LOG_FILE}")
         return report_data  # ✅ For report_generator
 
-    except Exception as e:
+    except BaseException as e:
+        # Keep what was journaled so far for a later resume, also on Ctrl-C
+        journal.close()
+        if not isinstance(e, Exception):
+            raise
         print(f"[ERROR] Unexpected error during artifact collection: {e}")
         return "[ERROR] Artifact collection failed."
 
@@ -98,4 +166,7 @@ if __name__ == "__main__":
     elif not os.path.isdir(destination):
         print(f"[ERROR] The destination directory does not exist: {destination}")
     else:
-        collect_artifacts(source, destination)
+        resume = False
+        if has_checkpoint("collection", source):
+            resume = input("An unfinished collection from this source was found. Resume it? (y/n): ").strip().lower() == "y"
+        collect_artifacts(source, destination, resume)
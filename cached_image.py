@@ -0,0 +1,122 @@
+import os
+import mmap
+from collections import OrderedDict
+import pytsk3
+
+# === Configuration ===
+# TSK already caches 64 KiB reads at sector (not 64 KiB) offsets, so blocks must be much larger
+# than that for most of its reads to land in a single cached block
+BLOCK_SIZE = 1024 * 1024  # Cache granularity; reads are aligned to this size
+CACHE_SIZE = 64 * 1024 * 1024  # Total bytes of blocks kept in the LRU cache
+MAX_READAHEAD_BLOCKS = 32  # Upper bound for the sequential readahead window
+NEAR_SEQUENTIAL_GAP = 256 * 1024  # A read starting at most this far past the last one counts as sequential
+
+
+class CachedImgInfo(pytsk3.Img_Info):
+    """Raw image handle for TSK with an LRU block cache and sequential readahead.
+
+    TSK issues many small, scattered reads while walking directories and metadata.
+    This class serves them from aligned cached blocks, grows a readahead window
+    while reads stay sequential, and can optionally memory-map local images instead.
+    """
+
+    def __init__(self, image_path, block_size=BLOCK_SIZE, cache_size=CACHE_SIZE, use_mmap=False):
+        self._file = open(image_path, "rb")
+        self._size = os.fstat(self._file.fileno()).st_size
+        self._block_size = block_size
+        self._max_blocks = max(1, cache_size // block_size)
+        self._last_block = max(0, (self._size - 1) // block_size)
+        self._cache = OrderedDict()  # block index -> bytes
+        self._readahead = 0
+        self._last_end = None
+        self._mmap = None
+        if use_mmap and self._size:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.stats = {"reads": 0, "hits": 0, "misses": 0, "syscalls": 0, "bytes_read": 0}
+        super().__init__(url="", type=pytsk3.TSK_IMG_TYPE_EXTERNAL)
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def get_size(self):
+        return self._size
+
+    def _read_raw(self, offset, size):
+        """Read straight from the image file with a single system call."""
+        self.stats["syscalls"] += 1
+        if hasattr(os, "pread"):
+            data = os.pread(self._file.fileno(), size, offset)
+        else:
+            self._file.seek(offset)
+            data = self._file.read(size)
+        self.stats["bytes_read"] += len(data)
+        return data
+
+    def _store(self, index, block):
+        self._cache[index] = block
+        if len(self._cache) > self._max_blocks:
+            self._cache.popitem(last=False)
+
+    def read(self, offset, size):
+        self.stats["reads"] += 1
+        if offset >= self._size or size <= 0:
+            return b""
+        size = min(size, self._size - offset)
+
+        if self._mmap is not None:
+            return self._mmap[offset:offset + size]
+
+        # Grow the readahead window while TSK keeps reading forward in small strides,
+        # as it does through inode tables and directory blocks
+        if self._last_end is not None and self._last_end - self._block_size <= offset <= self._last_end + NEAR_SEQUENTIAL_GAP:
+            self._readahead = min(max(1, self._readahead * 2), MAX_READAHEAD_BLOCKS)
+        else:
+            self._readahead = 0
+        self._last_end = offset + size
+
+        block_size = self._block_size
+        first = offset // block_size
+        last = (offset + size - 1) // block_size
+        parts = []
+        index = first
+        while index <= last:
+            block = self._cache.get(index)
+            if block is not None:
+                self._cache.move_to_end(index)
+                self.stats["hits"] += 1
+                parts.append(block)
+                index += 1
+                continue
+
+            # Fetch the whole run of missing blocks (plus readahead) in one read
+            end = index
+            while end < last and end + 1 not in self._cache:
+                end += 1
+            # Count requested blocks like hits do; readahead blocks are not misses
+            self.stats["misses"] += end - index + 1
+            if end == last:
+                end = min(last + self._readahead, self._last_block)
+            data = self._read_raw(index * block_size, (end - index + 1) * block_size)
+            for i in range(end - index + 1):
+                block = data[i * block_size:(i + 1) * block_size]
+                if not block:
+                    break
+                self._store(index + i, block)
+                if index + i <= last:
+                    parts.append(block)
+            index = min(end, last) + 1
+
+        data = b"".join(parts)
+        start = offset - first * block_size
+        return data[start:start + size]
+
+    def cache_summary(self):
+        """Return a one-line description of the cache statistics."""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        hit_rate = 100.0 * self.stats["hits"] / lookups if lookups else 0.0
+        return (f"Image reads: {self.stats['reads']}, cache hits: {self.stats['hits']}, "
+                f"misses: {self.stats['misses']} ({hit_rate:.1f}% hit rate), "
+                f"syscalls: {self.stats['syscalls']}, bytes read: {self.stats['bytes_read']}")
@@ -0,0 +1,260 @@
+import os
+import re
+import time
+import sqlite3
+
+# === Configuration ===
+REPORT_FOLDER = "C:\\Users\\sohai\\Desktop\\DF_REPORTS"
+CASE_NAME = "default"  # Case used when none has been selected
+CASE_ENV_VAR = "DF_CASE_NAME"  # Selects the active case; inherited by worker processes
+BATCH_SIZE = 5000  # Rows buffered before each insert transaction
+PAGE_SIZE = 1000  # Rows fetched per query when paging through findings
+BUSY_TIMEOUT = 30  # Seconds to wait for another process's write transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS findings (
+    id INTEGER PRIMARY KEY,
+    module TEXT NOT NULL,
+    type TEXT NOT NULL,
+    path TEXT,
+    detail TEXT,
+    event_time REAL,
+    recorded REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_findings_module_type ON findings(module, type);
+CREATE INDEX IF NOT EXISTS idx_findings_path ON findings(path);
+CREATE INDEX IF NOT EXISTS idx_findings_time ON findings(event_time);
+
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER,
+    mime TEXT,
+    sha256 TEXT,
+    created REAL,
+    modified REAL,
+    accessed REAL,
+    seen REAL
+);
+CREATE INDEX IF NOT EXISTS idx_files_modified ON files(modified);
+"""
+
+UPSERT_FILE = """
+INSERT INTO files (path, size, mime, sha256, created, modified, accessed, seen)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(path) DO UPDATE SET
+    seen = excluded.seen,
+    size = COALESCE(excluded.size, size),
+    mime = COALESCE(excluded.mime, mime),
+    sha256 = COALESCE(excluded.sha256, sha256),
+    created = COALESCE(excluded.created, created),
+    modified = COALESCE(excluded.modified, modified),
+    accessed = COALESCE(excluded.accessed, accessed)
+"""
+
+# A path equal to a scan root or below it; parameters are (root, len(prefix), prefix)
+UNDER_ROOT = "(path = ? OR substr(path, 1, ?) = ?)"
+
+
+def under_root_params(root):
+    prefix = os.path.join(root, "")
+    return (root, len(prefix), prefix)
+
+
+def set_active_case(case_name):
+    """Make case_name the case every later analysis in this process and its workers records into."""
+    case_name = re.sub(r"[^\w.\-]", "_", case_name.strip()) or CASE_NAME
+    os.environ[CASE_ENV_VAR] = case_name
+    return case_name
+
+
+def get_active_case():
+    """Return the selected case, falling back to CASE_NAME."""
+    return os.environ.get(CASE_ENV_VAR) or CASE_NAME
+
+
+def case_database_path(case_name=None):
+    """Return the SQLite file that stores all findings for a case, by default the active one."""
+    return os.path.join(REPORT_FOLDER, f"case_{case_name or get_active_case()}.db")
+
+
+def connect(case_name=None):
+    """Open the case database, creating the schema on first use."""
+    os.makedirs(REPORT_FOLDER, exist_ok=True)
+    conn = sqlite3.connect(case_database_path(case_name), timeout=BUSY_TIMEOUT)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    # Databases created before files.seen existed
+    if "seen" not in {row[1] for row in conn.execute("PRAGMA table_info(files)")}:
+        conn.execute("ALTER TABLE files ADD COLUMN seen REAL")
+    return conn
+
+
+class CaseWriter:
+    """Buffer findings from one analyzer and bulk-insert them in batched transactions.
+
+    By default a new run replaces the module's earlier findings; pass scope_path to
+    replace only the findings recorded for that path, scope_root to replace those at
+    or below a scanned directory, or replace=False to append. With prune_files, file
+    records below scope_root that a completed run did not add again are deleted.
+    """
+
+    def __init__(self, module, replace=True, scope_path=None, case_name=None, scope_root=None, prune_files=False):
+        self.module = module
+        self.replace = replace
+        self.scope_path = scope_path
+        self.scope_root = scope_root
+        self.prune_files = prune_files and scope_root is not None
+        self.started = time.time()
+        self.case_name = case_name or get_active_case()
+        self.count = 0
+        self._findings = []
+        self._files = []
+        self._conn = None
+
+    def __enter__(self):
+        self._conn = connect(self.case_name)
+        if self.replace:
+            with self._conn:
+                if self.scope_path is not None:
+                    self._conn.execute("DELETE FROM findings WHERE module = ? AND path = ?",
+                                       (self.module, self.scope_path))
+                elif self.scope_root is not None:
+                    self._conn.execute(f"DELETE FROM findings WHERE module = ? AND {UNDER_ROOT}",
+                                       (self.module, *under_root_params(self.scope_root)))
+                else:
+                    self._conn.execute("DELETE FROM findings WHERE module = ?", (self.module,))
+        return self
+
+    def add_finding(self, finding_type, path=None, detail=None, event_time=None):
+        self._findings.append((self.module, finding_type, path, detail, event_time, time.time()))
+        self.count += 1
+        if len(self._findings) >= BATCH_SIZE:
+            self.flush()
+
+    def add_file(self, path, size=None, mime=None, sha256=None, created=None, modified=None, accessed=None):
+        self._files.append((path, size, mime, sha256, created, modified, accessed, self.started))
+        if len(self._files) >= BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """Write buffered rows in a single transaction."""
+        with self._conn:
+            if self._findings:
+                self._conn.executemany(
+                    "INSERT INTO findings (module, type, path, detail, event_time, recorded) VALUES (?, ?, ?, ?, ?, ?)",
+                    self._findings)
+            if self._files:
+                self._conn.executemany(UPSERT_FILE, self._files)
+        self._findings = []
+        self._files = []
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.flush()
+            if self.prune_files and exc_type is None:
+                # Files gone since an earlier scan of this root would skew the activity summary
+                with self._conn:
+                    self._conn.execute(f"DELETE FROM files WHERE (seen IS NULL OR seen < ?) AND {UNDER_ROOT}",
+                                       (self.started, *under_root_params(self.scope_root)))
+        finally:
+            self._conn.close()
+        return False
+
+
+def record_findings(records, module, add, **writer_options):
+    """Pass records through unchanged while add(writer, record) stores each one in the case.
+
+    writer_options are passed to CaseWriter, e.g. scope_root.
+    """
+    with CaseWriter(module, **writer_options) as writer:
+        for record in records:
+            add(writer, record)
+            yield record
+
+
+def format_finding(finding_type, path, detail):
+    """Format a finding as a single report line."""
+    return f"{finding_type}: {path} ({detail})" if detail is not None else f"{finding_type}: {path}"
+
+
+class ModuleFindings:
+    """Lazy view of one module's findings: len() is an aggregate, iteration pages through rows."""
+
+    def __init__(self, module, case_name=None):
+        self.module = module
+        self.case_name = case_name or get_active_case()
+
+    def __len__(self):
+        conn = connect(self.case_name)
+        try:
+            return conn.execute("SELECT COUNT(*) FROM findings WHERE module = ?", (self.module,)).fetchone()[0]
+        finally:
+            conn.close()
+
+    def __iter__(self):
+        for _, finding_type, path, detail in iter_findings(self.module, case_name=self.case_name):
+            yield format_finding(finding_type, path, detail)
+
+
+def iter_findings(module=None, finding_type=None, case_name=None):
+    """Yield (id, type, path, detail) rows page by page using keyset pagination."""
+    conditions = ["id > ?"]
+    params = []
+    if module is not None:
+        conditions.append("module = ?")
+        params.append(module)
+    if finding_type is not None:
+        conditions.append("type = ?")
+        params.append(finding_type)
+    query = f"SELECT id, type, path, detail FROM findings WHERE {' AND '.join(conditions)} ORDER BY id LIMIT ?"
+
+    conn = connect(case_name)
+    try:
+        last_id = 0
+        while True:
+            rows = conn.execute(query, [last_id, *params, PAGE_SIZE]).fetchall()
+            if not rows:
+                return
+            yield from rows
+            last_id = rows[-1][0]
+    finally:
+        conn.close()
+
+
+def has_findings(case_name=None):
+    """Return True when any analyzer has recorded findings or file records for the case."""
+    conn = connect(case_name)
+    try:
+        return conn.execute("SELECT EXISTS (SELECT 1 FROM findings) OR EXISTS (SELECT 1 FROM files)").fetchone()[0] == 1
+    finally:
+        conn.close()
+
+
+def summarize_findings(case_name=None):
+    """Return {module: {type: count}} for every finding in the case."""
+    conn = connect(case_name)
+    try:
+        summary = {}
+        for module, finding_type, count in conn.execute(
+                "SELECT module, type, COUNT(*) FROM findings GROUP BY module, type"):
+            summary.setdefault(module, {})[finding_type] = count
+        return summary
+    finally:
+        conn.close()
+
+
+def suspicious_files_modified_after(timestamp, module="Suspicious File Detection", case_name=None):
+    """Return (path, type, detail, modified) for suspicious files modified after an epoch timestamp.
+
+    Modification times come from the files table filled by the metadata and timeline modules.
+    """
+    conn = connect(case_name)
+    try:
+        return conn.execute(
+            "SELECT f.path, f.type, f.detail, files.modified FROM findings f "
+            "JOIN files ON files.path = f.path "
+            "WHERE f.module = ? AND files.modified > ? ORDER BY files.modified",
+            (module, timestamp)).fetchall()
+    finally:
+        conn.close()
@@ -1,17 +1,25 @@
 import os
 import pytsk3
 from datetime import datetime
+from file_carving import carve_files
+from case_database import CaseWriter
+from cached_image import CachedImgInfo
 
 
 
 REPORT_FOLDER = r"C:\Users\sohai\Desktop\DF_REPORTS"
 RECOVERY_FOLDER = os.path.join(REPORT_FOLDER, "recovered_files")
+CARVED_FOLDER = os.path.join(REPORT_FOLDER, "carved_files")
 LOG_FILE = os.path.join(REPORT_FOLDER, "disk_recovery_log.txt")
+CASE_MODULE = "Disk Image Analysis"
+USE_MMAP = False  # Memory-map local images instead of using the block cache
+FS_OFFSET = 0  # Byte offset of the file system inside the image, e.g. a partition start
 
 def create_directories():
     """Ensure report and recovery directories exist."""
     os.makedirs(REPORT_FOLDER, exist_ok=True)
     os.makedirs(RECOVERY_FOLDER, exist_ok=True)
+    os.makedirs(CARVED_FOLDER, exist_ok=True)
 
 def log_message(message, log_entries, level="INFO"):
     """Log a message to both list and file."""
@@ -45,6 +53,65 @@ def recover_file(file_entry, file_name, log_entries):
         log_message(f"Failed to recover {file_name}: {e}", log_entries, level="ERROR")
         return None
 
+def merge_ranges(ranges):
+    """Sort (start, end) ranges and merge the ones that touch or overlap."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def allocated_ranges(fs, fs_offset=FS_OFFSET):
+    """Return merged byte ranges of the image occupied by allocated files' data runs.
+
+    fs_offset must be the offset FS_Info was opened with; block addresses are relative to it.
+    """
+    block_size = fs.info.block_size
+    base = fs_offset
+    ranges = []
+    seen = set()
+    stack = [fs.open_dir("/")]
+    while stack:
+        directory = stack.pop()
+        for entry in directory:
+            meta = entry.info.meta
+            if meta is None or entry.info.name.name in (b".", b"..") or meta.addr in seen:
+                continue
+            if not meta.flags & pytsk3.TSK_FS_META_FLAG_ALLOC:
+                continue
+            seen.add(meta.addr)
+            try:
+                if meta.type == pytsk3.TSK_FS_META_TYPE_DIR:
+                    stack.append(entry.as_directory())
+                    continue
+                for attr in entry:
+                    if not attr.info.flags & pytsk3.TSK_FS_ATTR_NONRES:
+                        continue
+                    for run in attr:
+                        # Sparse and filler runs have no blocks on disk
+                        if run.len and not run.flags:
+                            ranges.append((base + run.addr * block_size, base + (run.addr + run.len) * block_size))
+            except IOError:
+                continue
+    return merge_ranges(ranges)
+
+def carve_image(image_path, log_entries, skip_ranges=()):
+    """Carve files by signature so entries without directory records are still recovered.
+
+    Byte ranges of allocated files are skipped so live files are not copied again.
+    """
+    try:
+        carved_files = carve_files(image_path, CARVED_FOLDER, skip_ranges=skip_ranges)
+    except Exception as e:
+        log_message(f"File carving failed: {e}", log_entries, level="ERROR")
+        return []
+
+    for record in carved_files:
+        log_message(f"Carved {record['Type']} at offset {record['Offset']} ({record['Size']} bytes): {record['Path']}", log_entries)
+    return carved_files
+
 def analyze_disk_image(image_path):
     """Main function to analyze disk image and recover deleted files."""
     create_directories()
@@ -52,10 +119,11 @@ def analyze_disk_image(image_path):
     log_entries = []
     recovered_count = 0
     recovered_files = []
+    skip_ranges = ()
 
     try:
-        img_info = pytsk3.Img_Info(image_path)
-        fs = pytsk3.FS_Info(img_info)
+        img_info = CachedImgInfo(image_path, use_mmap=USE_MMAP)
+        fs = pytsk3.FS_Info(img_info, offset=FS_OFFSET)
         root_dir = fs.open_dir("/")
 
         for entry in root_dir:
@@ -68,13 +136,35 @@ def analyze_disk_image(image_path):
                         recovered_files.append(path)
             except Exception as e:
                 log_message(f"Error processing file entry: {e}", log_entries, level="ERROR")
+        # Only read errors fall back to carving everything; anything else is a bug and is raised
+        try:
+            skip_ranges = allocated_ranges(fs, FS_OFFSET)
+        except IOError as e:
+            log_message(f"Could not map allocated blocks; carving the whole image: {e}", log_entries, level="WARNING")
+        log_message(img_info.cache_summary(), log_entries)
+    except IOError as e:
+        log_message(f"Failed to analyze disk image: {e}", log_entries, level="ERROR")
+
+    # Carving reads the raw bytes, so it still runs when the file system cannot be opened
+    carved_files = carve_image(image_path, log_entries, skip_ranges)
 
-        write_report(image_path, recovered_count, recovered_files, timestamp, log_entries)
+    try:
+        write_report(image_path, recovered_count, recovered_files, timestamp, log_entries, carved_files)
+        record_case_findings(recovered_files, carved_files)
         send_to_report_generator("Disk Image Analysis", log_entries)
     except Exception as e:
-        log_message(f"Failed to analyze disk image: {e}", log_entries, level="ERROR")
-
-def write_report(image_path, count, recovered_files, timestamp, log_entries):
+        log_message(f"Failed to write disk image report: {e}", log_entries, level="ERROR")
+
+def record_case_findings(recovered_files, carved_files):
+    """Store recovered and carved files in the case database."""
+    with CaseWriter(CASE_MODULE) as case:
+        for path in recovered_files:
+            case.add_finding("RECOVERED", path)
+        for record in carved_files:
+            case.add_finding("CARVED", record["Path"], f"{record['Type']} at offset {record['Offset']}, {record['Size']} bytes")
+            case.add_file(record["Path"], size=record["Size"])
+
+def write_report(image_path, count, recovered_files, timestamp, log_entries, carved_files=()):
     """Write a full analysis report to file."""
     report_filename = f"disk_image_recovery_report_{timestamp}.txt"
     report_path = os.path.join(REPORT_FOLDER, report_filename)
@@ -86,7 +176,14 @@ def write_report(image_path, count, recovered_files, timestamp, log_entries):
         report.write(f"Analyzed Image: {image_path}\n")
         report.write(f"Recovered Files: {count}\n")
         report.write(f"Recovery Path: {RECOVERY_FOLDER}\n")
+        report.write(f"Carved Files: {len(carved_files)}\n")
+        report.write(f"Carving Path: {CARVED_FOLDER}\n")
         report.write("="*60 + "\n\n")
+        if carved_files:
+            report.write("Carved File Offsets:\n")
+            for record in carved_files:
+                report.write(f"  {record['Offset']:>14}  {record['Type']:<4}  {record['Size']:>10} bytes  {record['Path']}\n")
+            report.write("\n")
         for log in log_entries:
             report.write(log + "\n")
 
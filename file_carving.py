@@ -0,0 +1,254 @@
+import os
+import re
+import mmap
+import heapq
+import struct
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from io_scheduler import get_scheduler
+
+# === Configuration ===
+REPORT_FOLDER = r"C:\Users\sohai\Desktop\DF_REPORTS"
+CARVED_FOLDER = os.path.join(REPORT_FOLDER, "carved_files")
+CHUNK_SIZE = 64 * 1024 * 1024  # Bytes of image scanned per worker task
+
+# type: (header, footer, bytes kept after footer, max file size); JPEG and PE sizes come from their structure
+CARVE_SIGNATURES = {
+    "jpg": (b"\xff\xd8\xff", None, 0, 20 * 1024 * 1024),
+    "png": (b"\x89PNG\r\n\x1a\n", b"IEND\xaeB`\x82", 0, 20 * 1024 * 1024),
+    "pdf": (b"%PDF-", b"%%EOF", 0, 50 * 1024 * 1024),
+    "zip": (b"PK\x03\x04", b"PK\x05\x06", 18, 100 * 1024 * 1024),  # Also DOCX/XLSX/PPTX
+    "exe": (b"MZ", None, 0, 10 * 1024 * 1024),
+}
+
+# One alternation over every header so each chunk is scanned in a single pass
+HEADER_PATTERN = re.compile(b"|".join(
+    b"(?P<%s>%s)" % (ftype.encode(), re.escape(sig[0])) for ftype, sig in CARVE_SIGNATURES.items()
+))
+HEADER_OVERLAP = max(len(sig[0]) for sig in CARVE_SIGNATURES.values()) - 1
+# Any JPEG marker: 0xFF followed by something other than a stuffed zero or a restart marker
+JPEG_MARKER = re.compile(b"\xff[^\x00\xd0-\xd7]")
+
+
+def pe_signature_offset(data, offset=0):
+    """Return the e_lfanew offset of the PE header of an MZ file at offset, or None if there is none."""
+    try:
+        pe_offset = struct.unpack_from("<I", data, offset + 0x3C)[0]
+    except struct.error:
+        return None
+    if pe_offset > 4096 or data[offset + pe_offset:offset + pe_offset + 4] != b"PE\x00\x00":
+        return None
+    return pe_offset
+
+
+def pe_image_size(data, offset, limit):
+    """Return the on-disk size of a PE file starting at offset, or None if it is not a PE."""
+    pe_offset = pe_signature_offset(data, offset)
+    if pe_offset is None:
+        return None
+    try:
+        coff = offset + pe_offset + 4
+        section_count, optional_size = struct.unpack_from("<H12xH", data, coff + 2)
+        section_table = coff + 20 + optional_size
+        size = section_table - offset + section_count * 40
+        for i in range(section_count):
+            raw_size, raw_pointer = struct.unpack_from("<II", data, section_table + i * 40 + 16)
+            size = max(size, raw_pointer + raw_size)
+        return size if size <= limit else None
+    except struct.error:
+        return None
+
+
+def jpeg_length(data, offset, limit):
+    """Return the size of a JPEG at offset by walking its segments, or None if it is cut off.
+
+    Segments are skipped by their length fields, so the end marker of an EXIF thumbnail
+    embedded in APP1 is not mistaken for the end of the image.
+    """
+    end = offset + limit
+    pos = offset + 2
+    while pos + 4 <= end:
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:  # Fill byte before a marker
+            pos += 1
+            continue
+        if marker == 0xD9:
+            return pos + 2 - offset
+        if 0xD0 <= marker <= 0xD7 or marker == 0x01:
+            pos += 2
+            continue
+        pos += 2 + struct.unpack_from(">H", data, pos + 2)[0]
+        if marker == 0xDA:
+            # Entropy-coded scan data runs until the next real marker
+            match = JPEG_MARKER.search(data, pos, end)
+            if not match:
+                return None
+            pos = match.start()
+    return None
+
+
+class FooterFinder:
+    """Finds the next footer of each type, remembering results so no stretch is searched twice.
+
+    Without this, every header of a multi-entry ZIP would search forward for the same
+    end record, rescanning the archive once per entry.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.known = {}  # footer -> (searched from, searched to, first position or -1)
+
+    def find(self, footer, start, end):
+        searched = self.known.get(footer)
+        if searched is not None and searched[0] <= start <= searched[1]:
+            searched_from, searched_to, position = searched
+            if position >= start:
+                return position if position + len(footer) <= end else -1
+            if position == -1:
+                if end <= searched_to:
+                    return -1
+                # Only the stretch past the earlier search (plus a straddling footer) is new
+                position = self.data.find(footer, max(start, searched_to - len(footer) + 1), end)
+                self.known[footer] = (searched_from, end, position)
+                return position
+        position = self.data.find(footer, start, end)
+        self.known[footer] = (start, end, position)
+        return position
+
+
+def carve_length(data, ftype, offset, image_size, footers=None):
+    """Work out how many bytes belong to a file whose header sits at offset."""
+    header, footer, trailer, max_size = CARVE_SIGNATURES[ftype]
+    limit = min(max_size, image_size - offset)
+
+    if ftype == "exe":
+        return pe_image_size(data, offset, limit)
+    if ftype == "jpg":
+        return jpeg_length(data, offset, limit)
+
+    if footers is None:
+        end = data.find(footer, offset + len(header), offset + limit)
+    else:
+        end = footers.find(footer, offset + len(header), offset + limit)
+    if end == -1:
+        return None
+    return min(end + len(footer) + trailer - offset, limit)
+
+
+def scan_chunk(image_path, start, end):
+    """Find carvable files whose header starts within [start, end) of the image.
+
+    Headers inside a file already found in this chunk are skipped, so the image is
+    read close to sequentially.
+    """
+    found = []
+    with open(image_path, "rb") as f:
+        image_size = os.fstat(f.fileno()).st_size
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            footers = FooterFinder(data)
+            # Overlap the end so headers straddling the boundary are still matched
+            search_end = min(end + HEADER_OVERLAP, image_size)
+            pos = start
+            while True:
+                match = HEADER_PATTERN.search(data, pos, search_end)
+                if not match or match.start() >= end:
+                    break
+                offset = match.start()
+                ftype = match.lastgroup
+                length = carve_length(data, ftype, offset, image_size, footers)
+                if length:
+                    found.append((offset, ftype, length))
+                    pos = offset + length
+                else:
+                    pos = offset + 1
+    return found
+
+
+def resolve_chunk_hits(image_path, found):
+    """Reduce per-chunk hits to the non-overlapping ones a single sequential scan would find.
+
+    A chunk may start inside a file carved by the previous one and match a false header
+    there; the real headers that false match's length skipped are rescanned.
+    """
+    heap = list(found)
+    heapq.heapify(heap)
+    resolved = []
+    next_allowed = 0
+    while heap:
+        offset, ftype, length = heapq.heappop(heap)
+        if offset >= next_allowed:
+            resolved.append((offset, ftype, length))
+            next_allowed = offset + length
+        elif offset + length > next_allowed:
+            for hit in scan_chunk(image_path, next_allowed, offset + length):
+                heapq.heappush(heap, hit)
+    return resolved
+
+
+def find_carvable_files(image_path, workers=None):
+    """Scan the whole image in parallel chunks and return sorted, non-overlapping (offset, type, length) tuples."""
+    image_size = os.path.getsize(image_path)
+    if image_size == 0:
+        return []
+
+    ranges = [(start, min(start + CHUNK_SIZE, image_size)) for start in range(0, image_size, CHUNK_SIZE)]
+    scheduler = get_scheduler()
+    if len(ranges) == 1 and not scheduler.limited:
+        return scan_chunk(image_path, *ranges[0])
+
+    found = []
+    if scheduler.limited:
+        # Each worker process would get its own scheduler and multiply the ceilings,
+        # so throttled scans run chunk by chunk here and charge each chunk before reading it
+        for start, end in ranges:
+            scheduler.throttle(end - start)
+            found.extend(scan_chunk(image_path, start, end))
+        return resolve_chunk_hits(image_path, found)
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [pool.submit(scan_chunk, image_path, start, end) for start, end in ranges]
+        for future in futures:
+            found.extend(future.result())
+    return resolve_chunk_hits(image_path, found)
+
+
+def in_ranges(offset, ranges, starts):
+    """Check whether offset falls inside one of the sorted, non-overlapping (start, end) ranges."""
+    index = bisect_right(starts, offset) - 1
+    return index >= 0 and offset < ranges[index][1]
+
+
+def carve_files(image_path, output_folder=CARVED_FOLDER, workers=None, skip_ranges=()):
+    """Carve files from the raw image by signature and return a list of carving records.
+
+    skip_ranges holds sorted (start, end) byte ranges of allocated files; headers
+    inside them belong to live files and are not carved.
+    """
+    skip_starts = [start for start, _ in skip_ranges]
+    os.makedirs(output_folder, exist_ok=True)
+    carved = []
+
+    with open(image_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return carved
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for offset, ftype, length in find_carvable_files(image_path, workers):
+                if skip_ranges and in_ranges(offset, skip_ranges, skip_starts):
+                    continue
+                carved_path = os.path.join(output_folder, f"carved_{offset:012x}.{ftype}")
+                with open(carved_path, "wb") as out:
+                    out.write(data[offset:offset + length])
+                carved.append({"Type": ftype, "Offset": offset, "Size": length, "Path": carved_path})
+
+    return carved
+
+
+if __name__ == "__main__":
+    image_path = input("Enter the full path to the disk image: ").strip()
+    if not os.path.isfile(image_path):
+        print(f"[ERROR] The disk image {image_path} does not exist.")
+    else:
+        for record in carve_files(image_path):
+            print(f"[INFO] Carved {record['Type']} at offset {record['Offset']} ({record['Size']} bytes): {record['Path']}")
@@ -0,0 +1,155 @@
+import os
+import re
+import stat
+import time
+from io_scheduler import get_scheduler
+from file_carving import pe_signature_offset
+
+# === Configuration ===
+HEADER_SIZE = 8192  # Bytes read from the start of each file, enough for libmagic and the table below
+HEADER_BATCH_SIZE = 256  # Files whose headers one worker reads per task
+
+# kind: (label, magic numbers at offset 0, extensions that may carry this content)
+SIGNATURES = {
+    "pe": ("Windows executable (MZ/PE)", [b"MZ"], {
+        ".exe", ".dll", ".sys", ".scr", ".cpl", ".ocx", ".com", ".efi", ".drv", ".mui", ".pyd", ".node",
+        ".ax", ".acm", ".fon", ".ime", ".rll", ".tsp", ".xll", ".bpl", ".winmd", ".msstyles"}),
+    "elf": ("ELF executable", [b"\x7fELF"], {".so", ".o", ".ko", ".elf", ".bin", ".axf", ".out", ".node", ".prx"}),
+    "macho": ("Mach-O executable", [b"\xfe\xed\xfa\xce", b"\xce\xfa\xed\xfe", b"\xfe\xed\xfa\xcf", b"\xcf\xfa\xed\xfe"],
+              {".dylib", ".bundle", ".so", ".o", ".node"}),
+    "script": ("Script with shebang", [b"#!"], {
+        ".sh", ".bash", ".zsh", ".ksh", ".csh", ".fish", ".command", ".py", ".pyw", ".pl", ".pm", ".rb", ".php",
+        ".js", ".mjs", ".cjs", ".lua", ".tcl", ".awk", ".sed", ".cgi", ".r", ".ps1", ".expect", ".in"}),
+    "zip": ("ZIP archive", [b"PK\x03\x04", b"PK\x05\x06"], {
+        ".zip", ".jar", ".war", ".ear", ".apk", ".aar", ".whl", ".egg", ".xpi", ".nupkg", ".vsix", ".epub",
+        ".ipa", ".kmz", ".xap", ".appx", ".msix", ".docx", ".xlsx", ".pptx", ".docm", ".xlsm", ".pptm",
+        ".odt", ".ods", ".odp", ".odg"}),
+    "ooxml": ("Office Open XML document", [], {
+        ".docx", ".xlsx", ".pptx", ".docm", ".xlsm", ".pptm", ".dotx", ".dotm", ".xltx", ".xltm", ".potx",
+        ".potm", ".ppsx", ".ppsm", ".xlam", ".ppam", ".vsdx", ".vsdm"}),
+    "odf": ("OpenDocument file", [], {".odt", ".ods", ".odp", ".odg", ".odf", ".ott", ".ots", ".otp"}),
+    "ole": ("OLE2 compound document (legacy Office/MSI)", [b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"], {
+        ".doc", ".xls", ".ppt", ".dot", ".xlt", ".pot", ".pps", ".xla", ".msi", ".msp", ".mst", ".msg",
+        ".vsd", ".pub", ".mpp", ".db"}),
+    "rtf": ("RTF document", [b"{\\rtf"], {".rtf", ".doc"}),
+    "pdf": ("PDF document", [b"%PDF-"], {".pdf", ".ai"}),
+    "rar": ("RAR archive", [b"Rar!\x1a\x07"], {".rar"}),
+    "7z": ("7-Zip archive", [b"7z\xbc\xaf\x27\x1c"], {".7z"}),
+    "gzip": ("gzip archive", [b"\x1f\x8b"], {".gz", ".tgz", ".svgz"}),
+    "bzip2": ("bzip2 archive", [b"BZh"], {".bz2", ".tbz", ".tbz2"}),
+    "xz": ("xz archive", [b"\xfd7zXZ\x00"], {".xz", ".txz"}),
+    "cab": ("Cabinet archive", [b"MSCF"], {".cab", ".msu"}),
+}
+
+# Content that runs on its own is flagged under any foreign extension
+EXECUTABLE_KINDS = {"pe", "elf", "macho", "script"}
+# Unix executables and scripts commonly have no extension or a version suffix (libc.so.6, python3.11)
+EXTENSIONLESS_KINDS = {"elf", "macho", "script"}
+
+ZIP_MARKERS = [
+    ("ooxml", b"[Content_Types].xml"),
+    ("odf", b"mimetypeapplication/vnd.oasis.opendocument"),
+]
+# Document kinds packaged in a container kind. A document's marker may sit past the header,
+# so its extensions are accepted on plain container content and the other way round.
+CONTAINER_KINDS = {"ooxml": "zip", "odf": "zip"}
+
+# One anchored alternation over every magic number, longest first so prefixes cannot shadow them
+_MAGICS = sorted(((magic, kind) for kind, (_, magics, _) in SIGNATURES.items() for magic in magics),
+                 key=lambda item: -len(item[0]))
+SIGNATURE_PATTERN = re.compile(b"|".join(b"(?P<g%d>%s)" % (i, re.escape(magic)) for i, (magic, _) in enumerate(_MAGICS)))
+GROUP_KINDS = {f"g{i}": kind for i, (_, kind) in enumerate(_MAGICS)}
+# Extension -> the kind it claims, for spotting content that contradicts it
+CLAIMED_KINDS = {}
+for _kind, (_, _, _extensions) in SIGNATURES.items():
+    for _ext in _extensions:
+        CLAIMED_KINDS.setdefault(_ext, _kind)
+# Kind -> extensions its content may carry
+ALLOWED_EXTENSIONS = {kind: set(extensions) for kind, (_, _, extensions) in SIGNATURES.items()}
+for _kind, _container in CONTAINER_KINDS.items():
+    ALLOWED_EXTENSIONS[_container] |= SIGNATURES[_kind][2]
+    ALLOWED_EXTENSIONS[_kind] |= SIGNATURES[_container][2]
+
+
+def read_header(path, size=HEADER_SIZE):
+    """Return (first size bytes, stat result) of a file with one open and one read.
+
+    Raises OSError when the file cannot be opened. Special files such as FIFOs are
+    stat'ed but not read.
+    """
+    scheduler = get_scheduler()
+    start = time.perf_counter()
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0) | getattr(os, "O_NONBLOCK", 0))
+    try:
+        stats = os.fstat(fd)
+        header = os.read(fd, size) if stat.S_ISREG(stats.st_mode) else b""
+    finally:
+        os.close(fd)
+    scheduler.record(len(header), time.perf_counter() - start)
+    scheduler.throttle(len(header))
+    return header, stats
+
+
+def _read_batch(batch):
+    results = []
+    for item in batch:
+        try:
+            header, stats = read_header(os.fspath(item))
+            results.append((item, header, stats, None))
+        except OSError as e:
+            results.append((item, None, None, e))
+    return results
+
+
+def iter_headers(items, batch_size=HEADER_BATCH_SIZE):
+    """Yield (item, header, stat result, error) for paths or DirEntry objects, in order.
+
+    Headers are read in batches on the shared I/O scheduler's workers; error is the
+    OSError raised for an unreadable file, with header and stat result None.
+    """
+    def batches():
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    for results in get_scheduler().map(_read_batch, batches()):
+        yield from results
+
+
+def classify_header(header):
+    """Return the SIGNATURES kind of a file header, or None when nothing matches."""
+    match = SIGNATURE_PATTERN.match(header or b"")
+    if not match:
+        return None
+    kind = GROUP_KINDS[match.lastgroup]
+    if kind == "pe" and pe_signature_offset(header) is None:
+        # "MZ" alone also starts plain text; only a PE header makes it an executable
+        return None
+    if kind == "zip":
+        for container, marker in ZIP_MARKERS:
+            if marker in header:
+                return container
+    return kind
+
+
+def extension_mismatch(name, kind):
+    """Describe how a file's content contradicts its extension, or return None if it does not."""
+    if kind is None:
+        return None
+    ext = os.path.splitext(name)[1].lower()
+    label = SIGNATURES[kind][0]
+    if ext in ALLOWED_EXTENSIONS[kind]:
+        return None
+    if kind in EXECUTABLE_KINDS:
+        if kind in EXTENSIONLESS_KINDS and (not ext or ext[1:].isdigit() or ".so." in name.lower()):
+            return None
+        return f"{label} content with {ext or 'no'} extension"
+    claimed = CLAIMED_KINDS.get(ext)
+    if claimed is not None:
+        return f"{label} content but {ext} extension suggests {SIGNATURES[claimed][0]}"
+    return None
@@ -1,11 +1,26 @@
 import hashlib
 import os
 import json
+import mmap
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from case_database import CaseWriter
+from scan_rules import NO_RULES, walk_files
+from scan_checkpoint import CheckpointJournal, has_checkpoint
+from io_scheduler import get_scheduler
 
 HASH_STORAGE_FILE = "file_hashes.json"
 REPORT_FOLDER = r"C:\Users\sohai\Desktop\DF_REPORTS"
 LOG_FILE = os.path.join(REPORT_FOLDER, "integrity_checker_log.txt")
+CASE_MODULE = "File Integrity Checker"
+
+# Large-file fast path: BLAKE2b in tree mode with leaves hashed on every core
+LARGE_FILE_THRESHOLD = 1024 * 1024 * 1024  # Files this size or larger use the tree digest
+TREE_LEAF_SIZE = 64 * 1024 * 1024
+TREE_WORKERS = os.cpu_count()  # Capped by the I/O scheduler's worker limit
+REQUIRE_SHA256 = False  # Also compute the classic SHA-256 for chain of custody; it cannot be parallelized
+HASH_CHUNK_SIZE = 1024 * 1024
 
 def create_report_dir():
     """Ensure the report directory exists."""
@@ -20,12 +35,81 @@ def log_message(message, log_entries, level="INFO"):
         log.write(entry + "\n")
     print(entry)
 
-def calculate_hash(file_path):
-    """Calculate SHA256 hash of a file."""
-    sha256_hash = hashlib.sha256()
+def calculate_tree_hash(file_path, leaf_size=TREE_LEAF_SIZE, with_sha256=REQUIRE_SHA256):
+    """Hash a large file with BLAKE2b in tree mode, hashing leaves in parallel.
+
+    The tree has unlimited fanout and depth 2: every leaf_size block is a leaf and the
+    root hashes the leaf digests in order. hashlib releases the GIL while hashing, so
+    threads over a memory map use every core without copying data between processes.
+    Leaves are processed one window of workers at a time; with_sha256 feeds the same window to
+    SHA-256 in order while its leaves are hashed, so the file is read only once.
+    """
+    params = {"digest_size": 64, "fanout": 0, "depth": 2, "leaf_size": leaf_size, "inner_size": 64}
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        leaf_count = max(1, -(-size // leaf_size))
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        try:
+            data = memoryview(mapped) if mapped is not None else memoryview(b"")
+
+            scheduler = get_scheduler()
+            workers = max(1, min(TREE_WORKERS, scheduler.max_workers))
+
+            def hash_leaf(index):
+                leaf = data[index * leaf_size:(index + 1) * leaf_size]
+                start = time.perf_counter()
+                digest = hashlib.blake2b(leaf, node_offset=index, node_depth=0,
+                                         last_node=index == leaf_count - 1, **params).digest()
+                scheduler.record(len(leaf), time.perf_counter() - start)
+                return digest
+
+            sha256_hash = hashlib.sha256() if with_sha256 else None
+            leaf_digests = []
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for first in range(0, leaf_count, workers):
+                    window = range(first, min(first + workers, leaf_count))
+                    # Charge the window once; the leaf hashes and SHA-256 share its pages
+                    scheduler.throttle(min(size, (window[-1] + 1) * leaf_size) - first * leaf_size)
+                    futures = [pool.submit(hash_leaf, index) for index in window]
+                    if sha256_hash is not None:
+                        window_data = data[first * leaf_size:(window[-1] + 1) * leaf_size]
+                        for start in range(0, len(window_data), HASH_CHUNK_SIZE):
+                            sha256_hash.update(window_data[start:start + HASH_CHUNK_SIZE])
+                        window_data.release()
+                    leaf_digests.extend(future.result() for future in futures)
+            sha256_hex = sha256_hash.hexdigest() if sha256_hash is not None else None
+            data.release()
+        finally:
+            if mapped is not None:
+                mapped.close()
+
+    root = hashlib.blake2b(node_offset=0, node_depth=1, last_node=True, **params)
+    for digest in leaf_digests:
+        root.update(digest)
+
+    record = {"mode": "blake2b-tree", "blake2b_tree": root.hexdigest(), "leaf_size": leaf_size,
+              "fanout": 0, "depth": 2}
+    if sha256_hex:
+        record["sha256"] = sha256_hex
+    return record
+
+def calculate_hash(file_path, reference=None):
+    """Calculate SHA256 hash of a file.
+
+    Files of LARGE_FILE_THRESHOLD bytes or more take the tree-mode fast path and get a
+    dict recording the digest mode and leaf size. When reference (the stored baseline
+    entry) is given, the same mode and leaf size are used so the result is comparable.
+    """
     try:
+        if isinstance(reference, dict):
+            return calculate_tree_hash(file_path, reference.get("leaf_size", TREE_LEAF_SIZE),
+                                       REQUIRE_SHA256 or "sha256" in reference)
+        if reference is None and os.path.getsize(file_path) >= LARGE_FILE_THRESHOLD:
+            return calculate_tree_hash(file_path)
+
+        sha256_hash = hashlib.sha256()
         with open(file_path, "rb") as f:
-            while chunk := f.read(4096):
+            for chunk in get_scheduler().iter_chunks(f, HASH_CHUNK_SIZE):
                 sha256_hash.update(chunk)
         return sha256_hash.hexdigest()
     except FileNotFoundError:
@@ -33,6 +117,19 @@ def calculate_hash(file_path):
     except Exception:
         return None
 
+def hashes_match(stored, current):
+    """Compare two baseline entries, which are SHA-256 strings or tree-mode records."""
+    if isinstance(stored, dict) and isinstance(current, dict):
+        keys = [key for key in ("blake2b_tree", "sha256") if key in stored and key in current]
+        if stored.get("leaf_size") != current.get("leaf_size"):
+            keys = [key for key in keys if key == "sha256"]
+        return bool(keys) and all(stored[key] == current[key] for key in keys)
+    return stored == current
+
+def sha256_of(file_hash):
+    """Return the SHA-256 hex digest from a baseline entry, if it has one."""
+    return file_hash.get("sha256") if isinstance(file_hash, dict) else file_hash
+
 def save_hashes(hashes, log_entries):
     """Save new hashes to the local storage file."""
     try:
@@ -53,28 +150,55 @@ def load_hashes(log_entries):
             return {}
     return {}
 
-def check_integrity(directory, log_entries):
-    """Perform hash-based file integrity check in directory."""
+def check_integrity(directory, log_entries, resume=False, rules=NO_RULES):
+    """Perform hash-based file integrity check in directory.
+
+    Hashes are journaled as they are computed; with resume=True, files finished by an
+    interrupted run are taken from the journal instead of being hashed again. Files are
+    hashed on the shared I/O scheduler's workers. Nothing is excluded unless rules say so.
+    """
     stored_hashes = load_hashes(log_entries)
     new_hashes = {}
     changed_files = []
     checked_files = 0
 
-    log_message(f"Starting scan in directory: {directory}", log_entries)
+    journal = CheckpointJournal("integrity", directory, resume=resume)
+    if journal.completed:
+        log_message(f"Resuming scan in directory: {directory} ({len(journal.completed)} files already hashed)", log_entries)
+    else:
+        log_message(f"Starting scan in directory: {directory}", log_entries)
+
+    scheduler = get_scheduler()
 
-    for root, _, files in os.walk(directory):
-        for file in files:
-            file_path = os.path.join(root, file)
-            file_hash = calculate_hash(file_path)
+    def hash_entry(entry):
+        file_path = entry.path
+        file_hash = journal.completed.get(file_path)
+        if file_hash is not None:
+            return file_path, file_hash, False
+        return file_path, calculate_hash(file_path, stored_hashes.get(file_path)), True
+
+    try:
+        with CaseWriter(CASE_MODULE, scope_root=directory, prune_files=True) as case:
+            for file_path, file_hash, fresh in scheduler.map(hash_entry, walk_files(directory, rules)):
+                if fresh and file_hash:
+                    journal.record(file_path, file_hash)
 
-            if file_hash:
-                new_hashes[file_path] = file_hash
-                checked_files += 1
+                if file_hash:
+                    new_hashes[file_path] = file_hash
+                    checked_files += 1
+                    case.add_file(file_path, sha256=sha256_of(file_hash))
 
-                if file_path in stored_hashes and stored_hashes[file_path] != file_hash:
-                    changed_files.append(file_path)
+                    if file_path in stored_hashes and not hashes_match(stored_hashes[file_path], file_hash):
+                        changed_files.append(file_path)
+                        case.add_finding("MODIFIED", file_path, sha256_of(file_hash) or file_hash["blake2b_tree"])
+    except BaseException:
+        # Keep what was journaled so far for a later resume
+        journal.close()
+        raise
 
     save_hashes(new_hashes, log_entries)
+    journal.finish()
+    log_message(scheduler.summary(), log_entries)
 
     summary = f"\n[INFO] Total files scanned: {checked_files}\n"
     if changed_files:
@@ -88,7 +212,7 @@ def check_integrity(directory, log_entries):
 
     return summary
 
-def generate_report(directory):
+def generate_report(directory, resume=False, rules=NO_RULES):
     """Generate report, save to file, and return content."""
     create_report_dir()
     log_entries = []
@@ -105,7 +229,7 @@ def generate_report(directory):
     )
 
     try:
-        integrity_summary = check_integrity(directory, log_entries)
+        integrity_summary = check_integrity(directory, log_entries, resume, rules)
         report_content = report_header + integrity_summary + "\n\n" + "\n".join(log_entries)
 
         with open(report_path, "w", encoding="utf-8") as f:
@@ -132,5 +256,8 @@ if __name__ == "__main__":
     if not os.path.isdir(dir_to_scan):
         print(f"[ERROR] The directory '{dir_to_scan}' does not exist.")
     else:
-        final_report = generate_report(dir_to_scan)
+        resume = False
+        if has_checkpoint("integrity", dir_to_scan):
+            resume = input("An unfinished scan of this directory was found. Resume it? (y/n): ").strip().lower() == "y"
+        final_report = generate_report(dir_to_scan, resume)
         print(final_report)
@@ -0,0 +1,225 @@
+import os
+import time
+import ctypes
+import ctypes.util
+import select
+import struct
+from datetime import datetime
+from integrity_checker import (HASH_STORAGE_FILE, LOG_FILE, REPORT_FOLDER, calculate_hash, check_integrity,
+                               create_report_dir, hashes_match, load_hashes, log_message, save_hashes)
+from scan_rules import NO_RULES, walk_directories, walk_files
+
+# === Configuration ===
+DEBOUNCE_SECONDS = 2.0  # A file is re-hashed once it has been quiet this long
+RESCAN_INTERVAL = 6 * 60 * 60  # Full rescan as a safety net against missed events
+POLL_TIMEOUT = 0.5
+MONITOR_REPORT_PREFIX = "integrity_monitor_report"
+
+# inotify constants from <sys/inotify.h>
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ATTRIB | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """Minimal recursive inotify wrapper built on libc via ctypes."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available on this platform")
+        self._libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}  # watch descriptor -> directory path
+
+    def add_tree(self, directory, rules=NO_RULES):
+        """Watch a directory and every directory below it that the scan rules keep."""
+        for root in walk_directories(directory, rules):
+            if is_tool_output(root):
+                continue
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(root), WATCH_MASK)
+            if wd >= 0:
+                self.watches[wd] = root
+
+    def read_events(self, timeout):
+        """Return a list of (path, mask) events, waiting at most timeout seconds."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, name_len = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + name_len].rstrip(b"\0")
+            offset += name_len
+
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            directory = self.watches.get(wd)
+            if mask & IN_Q_OVERFLOW or directory is None:
+                events.append((None, mask))
+                continue
+            events.append((os.path.join(directory, os.fsdecode(name)) if name else directory, mask))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+def is_tool_output(path):
+    """Check whether a path is one the tool writes itself: its log, hash baseline or report folder.
+
+    Watching these would make every alert or save trigger another alert.
+    """
+    path = os.path.normcase(os.path.abspath(path))
+    if path in (os.path.normcase(os.path.abspath(HASH_STORAGE_FILE)), os.path.normcase(os.path.abspath(LOG_FILE))):
+        return True
+    report_folder = os.path.normcase(os.path.abspath(REPORT_FOLDER))
+    return path == report_folder or path.startswith(os.path.join(report_folder, ""))
+
+
+def record_alert(message, log_entries, report_file):
+    """Log an alert and append it to the monitor report immediately."""
+    log_message(message, log_entries, level="WARNING")
+    report_file.write(log_entries[-1] + "\n")
+    report_file.flush()
+
+
+def rehash_file(file_path, baseline, log_entries, report_file):
+    """Re-hash one file against the in-memory baseline and alert on changes."""
+    if not os.path.isfile(file_path):
+        if baseline.pop(file_path, None) is not None:
+            record_alert(f"File deleted or moved away: {file_path}", log_entries, report_file)
+            return True
+        return False
+
+    previous = baseline.get(file_path)
+    file_hash = calculate_hash(file_path, previous)
+    if not file_hash:
+        return False
+    if previous is not None and hashes_match(previous, file_hash):
+        return False
+
+    baseline[file_path] = file_hash
+    if previous is None:
+        record_alert(f"New file detected: {file_path}", log_entries, report_file)
+    else:
+        record_alert(f"File modified: {file_path}", log_entries, report_file)
+    return True
+
+
+def full_rescan(directory, baseline, log_entries, report_file, rules=NO_RULES):
+    """Re-hash every file under directory and return whether the baseline changed."""
+    log_message(f"Running full rescan of {directory}", log_entries)
+    changed = False
+    seen = set()
+    for entry in walk_files(directory, rules):
+        if is_tool_output(entry.path):
+            continue
+        seen.add(entry.path)
+        changed |= rehash_file(entry.path, baseline, log_entries, report_file)
+
+    prefix = os.path.join(directory, "")
+    for file_path in [path for path in baseline
+                      if path.startswith(prefix) and path not in seen and not is_tool_output(path)]:
+        changed |= rehash_file(file_path, baseline, log_entries, report_file)
+    return changed
+
+
+def monitor_directory(directory, duration=None, rules=NO_RULES):
+    """Watch a directory with inotify and re-hash files as they are written or renamed."""
+    create_report_dir()
+    log_entries = []
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    report_path = os.path.join(REPORT_FOLDER, f"{MONITOR_REPORT_PREFIX}_{timestamp}.txt")
+
+    # Establish the on-disk baseline with a normal integrity check first
+    check_integrity(directory, log_entries, rules=rules)
+    baseline = load_hashes(log_entries)
+    for file_path in [path for path in baseline if is_tool_output(path)]:
+        del baseline[file_path]
+
+    watcher = InotifyWatcher()
+    watcher.add_tree(directory, rules)
+    log_message(f"Monitoring {directory} ({len(watcher.watches)} directories watched)", log_entries)
+
+    pending = {}  # path -> time of the most recent event
+    started = last_rescan = time.monotonic()
+
+    with open(report_path, "a", encoding="utf-8") as report_file:
+        report_file.write(f"File Integrity Monitor Report\n{'='*60}\n"
+                          f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+                          f"Monitored Directory: {directory}\n{'='*60}\n\n")
+        try:
+            while duration is None or time.monotonic() - started < duration:
+                rescan_needed = False
+                for path, mask in watcher.read_events(POLL_TIMEOUT):
+                    if path is None:
+                        rescan_needed = True
+                    elif is_tool_output(path):
+                        continue
+                    elif mask & IN_ISDIR:
+                        if mask & (IN_CREATE | IN_MOVED_TO):
+                            watcher.add_tree(path, rules)
+                            for entry in walk_files(path, rules):
+                                pending[entry.path] = time.monotonic()
+                        elif mask & (IN_MOVED_FROM | IN_DELETE):
+                            prefix = os.path.join(path, "")
+                            for file_path in [p for p in baseline if p.startswith(prefix)]:
+                                pending[file_path] = time.monotonic()
+                    elif not mask & IN_CREATE:
+                        # Creation alone is followed by IN_CLOSE_WRITE once the file is written
+                        pending[path] = time.monotonic()
+
+                now = time.monotonic()
+                changed = False
+                if rescan_needed or now - last_rescan >= RESCAN_INTERVAL:
+                    # Directories created while events were lost have no watch yet; re-adding is idempotent
+                    watcher.add_tree(directory, rules)
+                    changed = full_rescan(directory, baseline, log_entries, report_file, rules)
+                    last_rescan = now
+                    pending.clear()
+
+                settled = [path for path, seen in pending.items() if now - seen >= DEBOUNCE_SECONDS]
+                for path in settled:
+                    del pending[path]
+                    changed |= rehash_file(path, baseline, log_entries, report_file)
+
+                if changed:
+                    save_hashes(baseline, log_entries)
+        except KeyboardInterrupt:
+            log_message("Monitoring stopped by user.", log_entries)
+        finally:
+            watcher.close()
+            save_hashes(baseline, log_entries)
+            report_file.write(f"\nStopped: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+
+    return report_path
+
+
+if __name__ == "__main__":
+    dir_to_watch = input("Enter the directory to monitor for changes: ").strip()
+    if not os.path.isdir(dir_to_watch):
+        print(f"[ERROR] The directory '{dir_to_watch}' does not exist.")
+    else:
+        print(f"[INFO] Monitor report saved to {monitor_directory(dir_to_watch)}")
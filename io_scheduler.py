@@ -0,0 +1,271 @@
+import os
+import sys
+import time
+import shutil
+import ctypes
+import platform
+import threading
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# === Configuration ===
+IO_MODE = "fast"  # "fast" runs as quickly as the storage allows, "stealth" stays under the ceilings below
+IO_MODES = {
+    "fast": {"max_workers": 32, "bytes_per_second": None, "iops": None, "low_priority": False},
+    "stealth": {"max_workers": 4, "bytes_per_second": 20 * 1024 * 1024, "iops": 200, "low_priority": True},
+}
+COPY_CHUNK_SIZE = 1024 * 1024
+TUNE_INTERVAL = 2.0  # Seconds of measurements between worker count adjustments
+MIN_GAIN = 0.10  # Relative throughput gain needed to keep adding workers
+MAX_LATENCY_FACTOR = 3.0  # Shed workers when latency grows past this multiple of the best seen
+THROTTLED_SHARE = 0.5  # Share of a window spent waiting on a ceiling at which workers are shed
+MAP_BUFFER_SIZE = 256  # Finished results map() holds back while an earlier item is still running
+
+# Linux ioprio_set(2) syscall numbers and constants
+IOPRIO_SYSCALLS = {"x86_64": 251, "AMD64": 251, "i386": 289, "i686": 289, "aarch64": 30, "armv7l": 314}
+IOPRIO_WHO_PROCESS = 1
+IOPRIO_CLASS_IDLE = 3
+IOPRIO_CLASS_SHIFT = 13
+PROCESS_MODE_BACKGROUND_BEGIN = 0x00100000  # Windows: low I/O and memory priority
+FALLBACK_NICENESS = 10
+
+_END = object()
+
+
+def lower_io_priority():
+    """Move this process to the background I/O class; return True on success.
+
+    On Linux the idle ioprio class is set on the calling thread and inherited by the
+    threads it starts, so this must run before any worker pool is created.
+    """
+    try:
+        if os.name == "nt":
+            kernel32 = ctypes.windll.kernel32
+            return bool(kernel32.SetPriorityClass(kernel32.GetCurrentProcess(), PROCESS_MODE_BACKGROUND_BEGIN))
+        number = IOPRIO_SYSCALLS.get(platform.machine())
+        if sys.platform.startswith("linux") and number is not None:
+            libc = ctypes.CDLL(None, use_errno=True)
+            if libc.syscall(number, IOPRIO_WHO_PROCESS, 0, IOPRIO_CLASS_IDLE << IOPRIO_CLASS_SHIFT) == 0:
+                return True
+        # Elsewhere a higher niceness is the closest option; CFQ/BFQ derive I/O priority from it
+        os.nice(FALLBACK_NICENESS)
+        return True
+    except (AttributeError, OSError) as e:
+        print(f"[WARNING] Could not lower I/O priority: {e}")
+        return False
+
+
+class TokenBucket:
+    """Rate limiter for bytes or operations per second, shared between threads."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, amount):
+        """Take amount tokens and return the seconds the caller must wait.
+
+        The bucket may go into debt so requests larger than the burst still pass;
+        callers queued behind them wait correspondingly longer.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+
+class IOScheduler:
+    """Shared concurrency and throttling for the walk, hash, copy and read stages.
+
+    Every I/O operation is charged against the ceilings by throttle() and timed by
+    record(). The measurements drive a hill climb over the worker count: workers are
+    added while throughput keeps improving, held once the gain levels off, and shed
+    when latency climbs or the configured ceilings are what limits progress.
+    """
+
+    def __init__(self, mode=IO_MODE):
+        settings = IO_MODES[mode]
+        self.mode = mode
+        self.max_workers = settings["max_workers"]
+        self.workers = 1 if mode == "stealth" else min(4, self.max_workers)
+        self.byte_limit = TokenBucket(settings["bytes_per_second"]) if settings["bytes_per_second"] else None
+        self.op_limit = TokenBucket(settings["iops"]) if settings["iops"] else None
+        # Worker processes build their own scheduler, so limited stages must stay in this process
+        self.limited = self.byte_limit is not None or self.op_limit is not None
+        self.low_priority = settings["low_priority"] and lower_io_priority()
+
+        self._lock = threading.Lock()
+        self._growing = True
+        self._last_rate = None
+        self._best_latency = None
+        self._reset_window(time.monotonic())
+        self.stats = {"operations": 0, "bytes": 0, "throttled_seconds": 0.0, "adjustments": 0}
+
+    def _reset_window(self, now):
+        self._window_start = now
+        self._window_ops = 0
+        self._window_bytes = 0
+        self._window_latency = 0.0
+        self._window_waited = 0.0
+
+    def throttle(self, nbytes=0):
+        """Block until one more operation of nbytes fits under the ceilings."""
+        wait = 0.0
+        if self.op_limit is not None:
+            wait = self.op_limit.consume(1)
+        if self.byte_limit is not None and nbytes:
+            wait = max(wait, self.byte_limit.consume(nbytes))
+        if wait:
+            time.sleep(wait)
+            with self._lock:
+                self._window_waited += wait
+                self.stats["throttled_seconds"] += wait
+
+    def record(self, nbytes, seconds):
+        """Account for a finished operation and retune the worker count when a window closes."""
+        with self._lock:
+            self._window_ops += 1
+            self._window_bytes += nbytes
+            self._window_latency += seconds
+            self.stats["operations"] += 1
+            self.stats["bytes"] += nbytes
+            now = time.monotonic()
+            if now - self._window_start >= TUNE_INTERVAL:
+                self._retune(now)
+
+    def _retune(self, now):
+        elapsed = now - self._window_start
+        # Metadata-only stages move no bytes, so fall back to operations per second
+        rate = ("bytes", self._window_bytes / elapsed) if self._window_bytes else ("ops", self._window_ops / elapsed)
+        latency = self._window_latency / self._window_ops
+        throttled = self._window_waited / (elapsed * self.workers) >= THROTTLED_SHARE
+        if self._best_latency is None or latency < self._best_latency:
+            self._best_latency = latency
+
+        workers = self.workers
+        if throttled or latency > self._best_latency * MAX_LATENCY_FACTOR:
+            # The ceiling or the device is the bottleneck; extra workers only queue up
+            workers -= 1
+            self._growing = False
+        elif self._last_rate is None or self._last_rate[0] != rate[0]:
+            if self._growing:
+                workers += 1
+        elif rate[1] > self._last_rate[1] * (1 + MIN_GAIN):
+            if self._growing:
+                workers = workers * 2 if workers < 8 else workers + 2
+        elif rate[1] < self._last_rate[1] * (1 - MIN_GAIN):
+            # Slower than the last window: step back and settle
+            workers -= 1
+            self._growing = False
+        else:
+            self._growing = False
+
+        workers = max(1, min(self.max_workers, workers))
+        if workers != self.workers:
+            self.workers = workers
+            self.stats["adjustments"] += 1
+        self._last_rate = rate
+        self._reset_window(now)
+
+    @contextmanager
+    def operation(self, nbytes=0):
+        """Throttle and time a block doing one I/O operation, such as a stat or directory listing."""
+        self.throttle(nbytes)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(nbytes, time.perf_counter() - start)
+
+    def iter_chunks(self, f, chunk_size):
+        """Yield successive chunks of an open binary file, throttling each read."""
+        while True:
+            start = time.perf_counter()
+            chunk = f.read(chunk_size)
+            self.record(len(chunk), time.perf_counter() - start)
+            # Charge what was actually read, so small files do not pay for a whole chunk
+            self.throttle(len(chunk))
+            if not chunk:
+                return
+            yield chunk
+
+    def copy_file(self, source_path, destination_path, chunk_size=COPY_CHUNK_SIZE):
+        """Copy a file with throttled reads and keep its metadata like shutil.copy2."""
+        with open(source_path, "rb") as src, open(destination_path, "wb") as dst:
+            for chunk in self.iter_chunks(src, chunk_size):
+                dst.write(chunk)
+        shutil.copystat(source_path, destination_path)
+
+    def map(self, func, items):
+        """Yield func(item) for every item in order, running up to the current worker count at once.
+
+        items is consumed lazily from the calling thread, so it can be a directory walk.
+        Only running items count against the worker limit: a slow item holds back the
+        results behind it, up to MAP_BUFFER_SIZE of them, but not new work.
+        """
+        items = iter(items)
+        pending = deque()  # Every submitted item in input order, finished or not
+        running = set()
+        exhausted = False
+        with self._lock:
+            # A new stage may have a different sweet spot, so probe upwards again
+            self._growing = True
+            self._last_rate = None
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while True:
+                while not exhausted and len(running) < self.workers and len(pending) < MAP_BUFFER_SIZE:
+                    item = next(items, _END)
+                    if item is _END:
+                        exhausted = True
+                        break
+                    future = pool.submit(func, item)
+                    pending.append(future)
+                    running.add(future)
+                if not pending:
+                    return
+                if pending[0].done():
+                    future = pending.popleft()
+                    running.discard(future)
+                    yield future.result()
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                running -= done
+
+    def summary(self):
+        return (f"I/O mode: {self.mode}, workers: {self.workers}, operations: {self.stats['operations']}, "
+                f"bytes: {self.stats['bytes']}, throttled: {self.stats['throttled_seconds']:.1f}s, "
+                f"worker adjustments: {self.stats['adjustments']}"
+                + (", low I/O priority" if self.low_priority else ""))
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Return the process-wide scheduler, creating it for IO_MODE on first use."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = IOScheduler(IO_MODE)
+        return _scheduler
+
+
+def set_io_mode(mode):
+    """Switch every later scan to another mode.
+
+    A lowered I/O priority stays in effect for the rest of the process.
+    """
+    global _scheduler
+    if mode not in IO_MODES:
+        raise ValueError(f"Unknown I/O mode: {mode}")
+    with _scheduler_lock:
+        if _scheduler is None or _scheduler.mode != mode:
+            _scheduler = IOScheduler(mode)
+        return _scheduler
@@ -1,6 +1,15 @@
 import os
 import re
+import bz2
+import gzip
+import lzma
 import time
+from concurrent.futures import ProcessPoolExecutor
+from log_index import iter_window_lines, read_log_range, parse_time_argument, parse_line_timestamp
+from case_database import CaseWriter
+from log_parsers import SlidingWindowCounter, format_burst, parser_for
+from scan_rules import DEFAULT_RULES, walk_files
+from io_scheduler import get_scheduler
 
 # Define suspicious patterns (you can customize this list)
 SUSPICIOUS_PATTERNS = [
@@ -12,11 +21,78 @@ SUSPICIOUS_PATTERNS = [
     r"error 403",
     r"error 404"
 ]
+SUSPICIOUS_REGEXES = [re.compile(pattern, re.IGNORECASE) for pattern in SUSPICIOUS_PATTERNS]
 
 REPORT_DIR = "C:/Users/sohai/Desktop/DF_REPORTS"
+CASE_MODULE = "Log File Analysis"
+MAX_WORKERS = None  # Processes used for directory sweeps, one rotation series each; None uses every core
+THROTTLE_BYTES = 1024 * 1024  # Text read between charges against the I/O scheduler's ceilings
 
-def analyze_log_file(log_file_path):
-    """Analyze a single log file for suspicious activity and return results."""
+# Compression is detected from the first bytes, never from the file name
+COMPRESSION_MAGIC = [
+    (b"\x1f\x8b", gzip.open),
+    (b"BZh", bz2.open),
+    (b"\xfd7zXZ\x00", lzma.open),
+]
+# syslog-style logs that carry no .log extension
+EXTENSIONLESS_LOG_NAMES = ["syslog", "messages", "secure", "maillog", "cron", "kern", "daemon", "debug", "dmesg"]
+# Current and rotated logs: auth.log, auth.log.1, auth.log.2.gz, auth.log-20250401.xz, syslog.1.gz, messages.2.gz
+ROTATED_LOG_NAME = re.compile(
+    r"^(?P<base>.+?\.(?:log|txt)|(?:%s))(?:[.-](?P<rotation>\d+))?(?:\.(?:gz|bz2|xz))?$"
+    % "|".join(map(re.escape, EXTENSIONLESS_LOG_NAMES)), re.IGNORECASE)
+
+def detect_compression(file_path):
+    """Return the opener for a compressed file based on its magic bytes, or None."""
+    with open(file_path, "rb") as f:
+        header = f.read(6)
+    for magic_bytes, opener in COMPRESSION_MAGIC:
+        if header.startswith(magic_bytes):
+            return opener
+    return None
+
+def iter_log_lines(log_file_path, start_time=None, end_time=None):
+    """Yield the lines of a plain or compressed log, decompressing on the fly."""
+    opener = detect_compression(log_file_path)
+    if opener is None:
+        if start_time or end_time:
+            yield from read_log_range(log_file_path, start_time, end_time)
+        else:
+            with open(log_file_path, 'r', encoding="utf-8", errors="ignore") as log_file:
+                yield from log_file
+        return
+
+    # Compressed streams cannot be indexed, so the time window is applied while streaming
+    with opener(log_file_path, "rb") as log_file:
+        if start_time or end_time:
+            year = time.localtime(os.path.getmtime(log_file_path)).tm_year
+            yield from iter_window_lines(log_file, start_time, end_time, year)
+        else:
+            for line in log_file:
+                yield line.decode("utf-8", errors="ignore")
+
+def throttled_lines(lines):
+    """Pass lines through, charging them against the shared I/O scheduler's ceilings in batches."""
+    scheduler = get_scheduler()
+    if not scheduler.limited:
+        yield from lines
+        return
+    pending = 0
+    for line in lines:
+        pending += len(line)
+        if pending >= THROTTLE_BYTES:
+            scheduler.throttle(pending)
+            pending = 0
+        yield line
+    scheduler.throttle(pending)
+
+def analyze_log_file(log_file_path, start_time=None, end_time=None, failures=None):
+    """Analyze a single log file for suspicious activity and return results.
+
+    When start_time or end_time is given, only lines in that window are analyzed,
+    using the sparse timestamp index stored next to the log. Compressed logs
+    (gzip, bzip2, xz) are decompressed as a stream. Pass the failures counter of
+    the previous file in a rotation series to catch bursts spanning the rotation.
+    """
     results = []
     
     if not os.path.exists(log_file_path):
@@ -26,21 +102,48 @@ def analyze_log_file(log_file_path):
         return [f"[ERROR] Permission denied: {log_file_path}. Please check the file permissions."]
 
     try:
-        with open(log_file_path, 'r', encoding="utf-8", errors="ignore") as log_file:
-            logs = log_file.readlines()
+        logs = throttled_lines(iter_log_lines(log_file_path, start_time, end_time))
+        year = time.localtime(os.path.getmtime(log_file_path)).tm_year
+        parser = parser_for(log_file_path, year)
+        if parser.needs_header:
+            # A time window skips line 0, so the header is read on its own first
+            header_lines = iter_log_lines(log_file_path)
+            parser.set_header(next(header_lines, ""))
+            header_lines.close()
+        if failures is None:
+            failures = SlidingWindowCounter()
+        bursts = []
+        with CaseWriter(CASE_MODULE, scope_path=log_file_path) as case:
+            for line in logs:
+                for pattern in SUSPICIOUS_REGEXES:
+                    if pattern.search(line):
+                        results.append(line.strip())
+                        ts = parse_line_timestamp(line.encode("utf-8"), year)
+                        case.add_finding("LOG_MATCH", log_file_path, line.strip(), ts.timestamp() if ts else None)
 
-        for line in logs:
-            for pattern in SUSPICIOUS_PATTERNS:
-                if re.search(pattern, line, re.IGNORECASE):
-                    results.append(line.strip())
+                # Count failures per source so bursts are caught without a literal "brute force"
+                event = parser.failure_event(line)
+                if event:
+                    burst = failures.add(event.key, event.timestamp)
+                    if burst:
+                        count, first_seen = burst
+                        entry = format_burst(event.key, count, first_seen, event.timestamp, failures.window)
+                        bursts.append(entry)
+                        case.add_finding("BURST", log_file_path, entry, event.timestamp)
+        results.extend(bursts)
 
         # Prepare the report
         os.makedirs(REPORT_DIR, exist_ok=True)
         timestamp = time.strftime("%Y%m%d_%H%M%S")
-        report_file = os.path.join(REPORT_DIR, f"log_analysis_{timestamp}.txt")
+        # The log name keeps reports from parallel workers from overwriting each other
+        log_name = re.sub(r"[^\w.\-]", "_", os.path.basename(log_file_path))
+        report_file = os.path.join(REPORT_DIR, f"log_analysis_{log_name}_{timestamp}.txt")
 
         with open(report_file, 'w', encoding="utf-8") as f:
-            f.write(f"Log File Analysis Report\nAnalyzed File: {log_file_path}\n\n")
+            f.write(f"Log File Analysis Report\nAnalyzed File: {log_file_path}\n")
+            if start_time or end_time:
+                f.write(f"Time Window: {start_time or 'start'} - {end_time or 'end'}\n")
+            f.write("\n")
             if results:
                 f.write("Suspicious Entries Found:\n")
                 for entry in results:
@@ -56,27 +159,74 @@ def analyze_log_file(log_file_path):
     except Exception as e:
         return [f"[ERROR] Failed to analyze log file: {e}"]
 
-def analyze_logs_in_directory(directory_path):
-    """Analyze all .log or .txt files in a directory recursively."""
+def rotation_order(log_file_path):
+    """Sort key placing a series' files oldest first and the live log last."""
+    rotation = ROTATED_LOG_NAME.match(os.path.basename(log_file_path)).group("rotation")
+    if rotation is None:
+        return (2, 0)
+    if len(rotation) >= 8:
+        return (1, int(rotation))  # Date suffix: later dates are newer
+    return (0, -int(rotation))  # Numeric suffix: higher numbers are older
+
+def analyze_log_series(log_files, start_time=None, end_time=None):
+    """Analyze the files of one rotation series oldest first with a single failure counter.
+
+    Returns one result list per file, in the order given.
+    """
+    failures = SlidingWindowCounter()
+    return [analyze_log_file(path, start_time, end_time, failures) for path in log_files]
+
+def find_log_series(directory_path, rules=DEFAULT_RULES):
+    """Group plain, rotated and compressed logs into series keyed by their live log path."""
+    series = {}
+    for entry in walk_files(directory_path, rules):
+        match = ROTATED_LOG_NAME.match(entry.name)
+        if match:
+            base = os.path.join(os.path.dirname(entry.path), match.group("base"))
+            series.setdefault(base, []).append(entry.path)
+    for files in series.values():
+        files.sort(key=rotation_order)
+    return series
+
+def analyze_logs_in_directory(directory_path, start_time=None, end_time=None, rules=DEFAULT_RULES):
+    """Analyze all .log, .txt and syslog-style logs in a directory recursively, including rotations.
+
+    Each rotation series is analyzed oldest file first in one process, so failure
+    bursts crossing a rotation are counted together; series are spread across a
+    process pool.
+    """
     final_results = []
     if not os.path.isdir(directory_path):
         return [f"[ERROR] Provided path is not a directory: {directory_path}"]
 
-    for root, dirs, files in os.walk(directory_path):
-        for file in files:
-            if file.endswith('.log') or file.endswith('.txt'):
-                log_file_path = os.path.join(root, file)
-                result = analyze_log_file(log_file_path)
-                final_results.extend(result)
+    rules = rules.run_copy()
+    series = sorted(find_log_series(directory_path, rules).items())
+    file_lists = [files for _, files in series]
+    # Worker processes would each get their own scheduler, so throttled sweeps stay in this process
+    if len(series) > 1 and not get_scheduler().limited:
+        with ProcessPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            series_results = list(pool.map(analyze_log_series, file_lists,
+                                           [start_time] * len(series), [end_time] * len(series)))
+    else:
+        series_results = [analyze_log_series(files, start_time, end_time) for files in file_lists]
+
+    for (base, files), file_results in zip(series, series_results):
+        if len(files) > 1:
+            final_results.append(f"=== Log series: {base} ({len(files)} files) ===")
+        for results in file_results:
+            final_results.extend(results)
 
+    final_results.append(f"[INFO] {rules.summary()}")
     return final_results
 
 # Optional direct script usage
 if __name__ == "__main__":
     path = input("Enter the path to the log file or directory: ").strip()
+    start_time = parse_time_argument(input("Window start (YYYY-MM-DD HH:MM, blank for none): "))
+    end_time = parse_time_argument(input("Window end (YYYY-MM-DD HH:MM, blank for none): "))
     if os.path.isdir(path):
-        results = analyze_logs_in_directory(path)
+        results = analyze_logs_in_directory(path, start_time, end_time)
     else:
-        results = analyze_log_file(path)
+        results = analyze_log_file(path, start_time, end_time)
     
     print("\n".join(results))
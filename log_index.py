@@ -0,0 +1,155 @@
+import os
+import re
+import json
+from bisect import bisect_right
+from datetime import datetime
+
+# === Configuration ===
+INDEX_SUFFIX = ".tsidx"
+INDEX_INTERVAL = 1024 * 1024  # One index entry per MiB of log
+INDEX_VERSION = 1
+MAX_PROBE_LINES = 1000  # Lines read past a boundary looking for a timestamp
+
+ISO_TIMESTAMP = re.compile(rb"(\d{4}-\d{2}-\d{2})[ T](\d{2}:\d{2}:\d{2})")
+SYSLOG_TIMESTAMP = re.compile(rb"^([A-Z][a-z]{2}) +(\d{1,2}) (\d{2}:\d{2}:\d{2})")
+
+_index_cache = {}  # Indexes already loaded in this process, keyed by log path
+
+
+def parse_line_timestamp(line, default_year):
+    """Return the timestamp of a raw log line as a datetime, or None if it has none."""
+    match = ISO_TIMESTAMP.search(line, 0, 64)
+    if match:
+        try:
+            return datetime.strptime(f"{match.group(1).decode()} {match.group(2).decode()}", "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            return None
+
+    match = SYSLOG_TIMESTAMP.match(line)
+    if match:
+        month, day, clock = (part.decode() for part in match.groups())
+        try:
+            return datetime.strptime(f"{default_year} {month} {day} {clock}", "%Y %b %d %H:%M:%S")
+        except ValueError:
+            return None
+    return None
+
+
+def index_path_for(log_path):
+    """Return the path of the index file stored next to a log."""
+    return log_path + INDEX_SUFFIX
+
+
+def build_index(log_path, interval=INDEX_INTERVAL):
+    """Build a sparse timestamp -> byte offset index by probing the log every interval bytes."""
+    stats = os.stat(log_path)
+    year = datetime.fromtimestamp(stats.st_mtime).year
+    entries = []
+
+    with open(log_path, "rb") as f:
+        for boundary in range(0, stats.st_size, interval):
+            f.seek(boundary)
+            if boundary:
+                f.readline()  # Skip the partial line at the boundary
+            for _ in range(MAX_PROBE_LINES):
+                offset = f.tell()
+                line = f.readline()
+                if not line or offset >= boundary + interval:
+                    break
+                ts = parse_line_timestamp(line, year)
+                if ts:
+                    if not entries or ts.timestamp() >= entries[-1][0]:
+                        entries.append([ts.timestamp(), offset])
+                    break
+
+    return {
+        "version": INDEX_VERSION,
+        "size": stats.st_size,
+        "mtime": stats.st_mtime,
+        "year": year,
+        "interval": interval,
+        "entries": entries,
+    }
+
+
+def is_index_current(index, log_path):
+    """Check that an index still matches the log's size and modification time."""
+    try:
+        stats = os.stat(log_path)
+    except OSError:
+        return False
+    return (index.get("version") == INDEX_VERSION
+            and index.get("size") == stats.st_size
+            and index.get("mtime") == stats.st_mtime)
+
+
+def load_index(log_path):
+    """Return a current index for the log, rebuilding and saving it when stale or missing."""
+    index = _index_cache.get(log_path)
+    if index and is_index_current(index, log_path):
+        return index
+
+    index_path = index_path_for(log_path)
+    if os.path.exists(index_path):
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except Exception as e:
+            print(f"[WARNING] Ignoring unreadable log index {index_path}: {e}")
+            index = None
+
+    if not index or not is_index_current(index, log_path):
+        index = build_index(log_path)
+        try:
+            with open(index_path, "w", encoding="utf-8") as f:
+                json.dump(index, f)
+        except Exception as e:
+            print(f"[WARNING] Could not save log index {index_path}: {e}")
+
+    _index_cache[log_path] = index
+    return index
+
+
+def read_log_range(log_path, start_time=None, end_time=None):
+    """Yield decoded lines of a log whose timestamps fall within [start_time, end_time]."""
+    index = load_index(log_path)
+    year = index["year"]
+    start_offset = 0
+    if start_time and index["entries"]:
+        position = bisect_right([entry[0] for entry in index["entries"]], start_time.timestamp())
+        if position:
+            start_offset = index["entries"][position - 1][1]
+
+    with open(log_path, "rb") as f:
+        f.seek(start_offset)
+        yield from iter_window_lines(f, start_time, end_time, year)
+
+
+def iter_window_lines(raw_lines, start_time, end_time, default_year):
+    """Yield decoded lines from an iterable of raw lines that fall within [start_time, end_time].
+
+    Used directly for streams that cannot be indexed, such as compressed logs.
+    """
+    in_window = start_time is None
+    for line in raw_lines:
+        ts = parse_line_timestamp(line, default_year)
+        if ts:
+            if end_time and ts > end_time:
+                break
+            in_window = start_time is None or ts >= start_time
+        # Lines without a timestamp belong to the preceding entry
+        if in_window:
+            yield line.decode("utf-8", errors="ignore")
+
+
+def parse_time_argument(value):
+    """Parse a 'YYYY-MM-DD HH:MM[:SS]' string, returning None for blank input."""
+    value = value.strip()
+    if not value:
+        return None
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised time: {value}")
@@ -0,0 +1,191 @@
+import re
+import csv
+from collections import OrderedDict, deque
+from datetime import datetime
+
+# === Configuration ===
+BURST_WINDOW_SECONDS = 300  # Sliding window for counting failures per key
+BURST_THRESHOLD = 5  # Failures within the window that count as a burst
+MAX_TRACKED_KEYS = 100_000  # Least recently seen keys are evicted beyond this
+
+# Cheap pre-filter: only lines that look like failures are fully parsed
+FAILURE_PATTERN = re.compile(
+    r"failed|failure|invalid (?:user|password)|authentication error|denied|locked", re.IGNORECASE)
+
+SYSLOG_LINE = re.compile(
+    r"^(?P<ts>[A-Z][a-z]{2} +\d{1,2} \d{2}:\d{2}:\d{2}|\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2})\S*"
+    r"(?: (?P<host>[\w.\-]+) (?P<program>[\w.\-/]+)(?:\[\d+\])?:)? (?P<message>.*)$")
+IPV4_PATTERN = re.compile(r"\b(\d{1,3}(?:\.\d{1,3}){3})\b")
+USER_PATTERN = re.compile(r"(?:for (?:invalid user )?|user[= ]|by )(?P<user>[\w.\-@$]+)", re.IGNORECASE)
+
+CSV_TIME_COLUMNS = ("timestamp", "time", "date", "datetime")
+CSV_USER_COLUMNS = ("user", "username", "account")
+CSV_IP_COLUMNS = ("source_ip", "src_ip", "ip", "client_ip", "source")
+CSV_HOST_COLUMNS = ("host", "hostname", "computer")
+
+
+class LogEvent:
+    """A parsed log line; the timestamp is an epoch float."""
+    __slots__ = ("timestamp", "host", "user", "source_ip", "message")
+
+    def __init__(self, timestamp, host, user, source_ip, message):
+        self.timestamp = timestamp
+        self.host = host
+        self.user = user
+        self.source_ip = source_ip
+        self.message = message
+
+    @property
+    def key(self):
+        """Aggregation key for burst detection: source IP, then user, then host."""
+        if self.source_ip:
+            return f"ip {self.source_ip}"
+        if self.user:
+            return f"user {self.user}"
+        return f"host {self.host or 'unknown'}"
+
+
+def parse_timestamp(value, default_year):
+    """Parse an ISO or syslog timestamp string into an epoch float, or None."""
+    value = value.strip()
+    try:
+        if value[:1].isdigit():
+            return datetime.strptime(value[:19].replace("T", " "), "%Y-%m-%d %H:%M:%S").timestamp()
+        return datetime.strptime(f"{default_year} {value}", "%Y %b %d %H:%M:%S").timestamp()
+    except ValueError:
+        return None
+
+
+class SyslogParser:
+    """Parser for syslog/auth.log style lines and plain timestamped text logs."""
+    needs_header = False
+
+    def __init__(self, default_year):
+        self.default_year = default_year
+
+    def parse(self, line):
+        match = SYSLOG_LINE.match(line.rstrip("\r\n"))
+        if not match:
+            return None
+        timestamp = parse_timestamp(match.group("ts"), self.default_year)
+        if timestamp is None:
+            return None
+        message = match.group("message")
+        ip = IPV4_PATTERN.search(message)
+        user = USER_PATTERN.search(message)
+        return LogEvent(timestamp, match.group("host"), user.group("user") if user else None,
+                        ip.group(1) if ip else None, message)
+
+    def failure_event(self, line):
+        """Return a LogEvent when the line records a failure, otherwise None."""
+        if not FAILURE_PATTERN.search(line):
+            return None
+        return self.parse(line)
+
+
+class CsvLogParser:
+    """Parser for CSV log exports.
+
+    The header comes from set_header(); without it the first line fed to parse() is
+    taken as the header.
+    """
+    needs_header = True
+
+    def __init__(self, default_year):
+        self.default_year = default_year
+        self.columns = None
+
+    def set_header(self, line):
+        """Map the column names of a CSV header line to their indexes."""
+        row = next(csv.reader([line]), None) or []
+        self.columns = {name.strip().lower(): i for i, name in enumerate(row)}
+        self.time_col = self._column(CSV_TIME_COLUMNS)
+        self.user_col = self._column(CSV_USER_COLUMNS)
+        self.ip_col = self._column(CSV_IP_COLUMNS)
+        self.host_col = self._column(CSV_HOST_COLUMNS)
+
+    def _column(self, names):
+        for name in names:
+            if name in self.columns:
+                return self.columns[name]
+        return None
+
+    def parse(self, line):
+        row = next(csv.reader([line]), None)
+        if not row:
+            return None
+        if self.columns is None:
+            self.set_header(line)
+            return None
+
+        def field(index):
+            if index is None or index >= len(row):
+                return None
+            return row[index].strip() or None
+
+        timestamp = parse_timestamp(field(self.time_col) or "", self.default_year)
+        if timestamp is None:
+            return None
+        message = ",".join(row)
+        user = field(self.user_col)
+        if user is None:
+            match = USER_PATTERN.search(message)
+            user = match.group("user") if match else None
+        return LogEvent(timestamp, field(self.host_col), user, field(self.ip_col), message)
+
+    def failure_event(self, line):
+        """Return a LogEvent when the row records a failure, otherwise None."""
+        if self.columns is not None and not FAILURE_PATTERN.search(line):
+            return None
+        return self.parse(line)
+
+
+def parser_for(log_file_path, default_year):
+    """Pick a parser for a log file based on its name."""
+    if log_file_path.lower().endswith(".csv"):
+        return CsvLogParser(default_year)
+    return SyslogParser(default_year)
+
+
+class SlidingWindowCounter:
+    """Per-key event counts over a sliding time window with a bounded number of keys."""
+
+    def __init__(self, window=BURST_WINDOW_SECONDS, threshold=BURST_THRESHOLD, max_keys=MAX_TRACKED_KEYS):
+        self.window = window
+        self.threshold = threshold
+        self.max_keys = max_keys
+        self._events = OrderedDict()  # key -> deque of timestamps, least recently seen first
+        self._bursting = set()
+
+    def add(self, key, timestamp):
+        """Record an event; return (count, first_timestamp) when the key starts a burst."""
+        times = self._events.get(key)
+        if times is None:
+            times = self._events[key] = deque()
+            if len(self._events) > self.max_keys:
+                evicted, _ = self._events.popitem(last=False)
+                self._bursting.discard(evicted)
+        else:
+            self._events.move_to_end(key)
+
+        times.append(timestamp)
+        while times and times[0] <= timestamp - self.window:
+            times.popleft()
+        # Keep at most threshold timestamps; older ones cannot change the outcome
+        while len(times) > self.threshold:
+            times.popleft()
+
+        if len(times) >= self.threshold:
+            if key not in self._bursting:
+                self._bursting.add(key)
+                return len(times), times[0]
+        else:
+            self._bursting.discard(key)
+        return None
+
+
+def format_burst(key, count, first_timestamp, last_timestamp, window):
+    """Describe a detected burst as a single report line."""
+    start = datetime.fromtimestamp(first_timestamp).strftime("%Y-%m-%d %H:%M:%S")
+    end = datetime.fromtimestamp(last_timestamp).strftime("%Y-%m-%d %H:%M:%S")
+    return f"[BURST] {count} failures from {key} within {window}s ({start} - {end})"
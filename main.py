@@ -8,7 +8,11 @@ from suspicious_file_detection import detect_suspicious_files
 from disk_image_analysis import analyze_disk_image
 from log_file_analysis import analyze_log_file
 from automated_artifact_collection import collect_artifacts
-from report_generator import generate_report
+from report_generator import generate_report, load_analysis_results
+from case_database import CASE_NAME, get_active_case, has_findings, set_active_case
+from scan_checkpoint import has_checkpoint
+from timeline_activity import summarize_case_activity
+from io_scheduler import IO_MODE, set_io_mode
 from integrity_checker import generate_report as generate_integrity_report
 
 REPORTS_DIR = "C:/Users/sohai/Desktop/DF_REPORTS"
@@ -16,6 +20,7 @@ if not os.path.exists(REPORTS_DIR):
     os.makedirs(REPORTS_DIR)
 
 results = {}  # Global dictionary to accumulate results
+MAX_PREVIEW_LINES = 1000  # Lines per analysis kept in memory for the PDF report
 
 # GUI functionality
 class ForensicApp(tk.Tk):
@@ -38,7 +43,19 @@ class ForensicApp(tk.Tk):
         tk.Button(btn_frame, text="Select File", command=self.open_file_dialog).grid(row=0, column=0, padx=5)
         tk.Button(btn_frame, text="Select Directory", command=self.open_directory_dialog).grid(row=0, column=1, padx=5)
 
-        self.add_button("File Integrity Checker", lambda: self.run_analysis("File Integrity", generate_integrity_report))
+        case_frame = tk.Frame(self, bg="#f0f0f0")
+        case_frame.pack(pady=5)
+        tk.Label(case_frame, text="Case name:", bg="#f0f0f0").grid(row=0, column=0, padx=5)
+        self.entry_case = tk.Entry(case_frame, width=30)
+        self.entry_case.insert(0, get_active_case())
+        self.entry_case.grid(row=0, column=1, padx=5)
+
+        self.stealth_mode = tk.BooleanVar(value=IO_MODE == "stealth")
+        tk.Checkbutton(self, text="Low-impact I/O (stealth mode)", variable=self.stealth_mode,
+                       command=self.toggle_io_mode, bg="#f0f0f0").pack(pady=5)
+
+        self.add_button("File Integrity Checker", lambda: self.run_analysis(
+            "File Integrity", lambda path: generate_integrity_report(path, self.ask_resume("integrity", path))))
         self.add_button("Digital Evidence Timeline", lambda: self.run_analysis("Digital Evidence Timeline", generate_timeline))
         self.add_button("Suspicious File Detection", lambda: self.run_analysis("Suspicious File Detection", detect_suspicious_files))
         self.add_button("Forensic Disk Image Analysis", lambda: self.run_analysis("Forensic Disk Image Analysis", analyze_disk_image))
@@ -63,6 +80,20 @@ class ForensicApp(tk.Tk):
             self.entry_path.delete(0, tk.END)
             self.entry_path.insert(0, dir_path)
 
+    def toggle_io_mode(self):
+        """Switch later scans between full speed and throttled, low-priority I/O."""
+        set_io_mode("stealth" if self.stealth_mode.get() else "fast")
+
+    def select_case(self):
+        """Record every later finding into the case named in the case field."""
+        return set_active_case(self.entry_case.get() or CASE_NAME)
+
+    def ask_resume(self, kind, path):
+        """Offer to resume when an earlier scan of this path was interrupted."""
+        if not has_checkpoint(kind, path):
+            return False
+        return messagebox.askyesno("Resume Scan", "An unfinished scan of this path was found.\nResume where it stopped?")
+
     def run_analysis(self, label, analysis_function):
         try:
             path = self.entry_path.get()
@@ -70,14 +101,29 @@ class ForensicApp(tk.Tk):
                 messagebox.showerror("Input Error", "Please enter a valid path.")
                 return
 
+            self.select_case()
             result = analysis_function(path)
-            results[label] = result if isinstance(result, list) else [str(result)]
+            # Timeline and suspicious file detection return (lazy results, extra info)
+            if isinstance(result, tuple):
+                result = result[0]
+            if result is None or isinstance(result, str):
+                result = [str(result)]
 
-            # Save results to individual text file
+            # Stream results to an individual text file, keeping only a preview in memory
             timestamp = time.strftime('%Y%m%d_%H%M%S')
             output_path = os.path.join(REPORTS_DIR, f"{label.replace(' ', '_')}_{timestamp}.txt")
-            with open(output_path, 'w') as f:
-                f.write("\n".join(results[label]))
+            preview = []
+            count = 0
+            with open(output_path, 'w', encoding='utf-8') as f:
+                for item in result:
+                    line = str(item)
+                    f.write(("\n" if count else "") + line)
+                    if count < MAX_PREVIEW_LINES:
+                        preview.append(line)
+                    count += 1
+            if count > MAX_PREVIEW_LINES:
+                preview.append(f"... {count - MAX_PREVIEW_LINES} more item(s) in {output_path}")
+            results[label] = preview
 
             messagebox.showinfo(label, f"Analysis completed. Results saved at:\n{output_path}")
         except Exception as e:
@@ -89,7 +135,8 @@ class ForensicApp(tk.Tk):
             if not source:
                 messagebox.showerror("Input Error", "Please enter a valid source path.")
                 return
-            result = collect_artifacts(source, REPORTS_DIR)
+            self.select_case()
+            result = collect_artifacts(source, REPORTS_DIR, self.ask_resume("collection", source))
             results['Automated Artifact Collection'] = result if isinstance(result, list) else [str(result)]
             messagebox.showinfo("Automated Artifact Collection", "Artifacts collected successfully.")
         except Exception as e:
@@ -97,9 +144,14 @@ class ForensicApp(tk.Tk):
 
     def generate_full_report(self):
         try:
+            self.select_case()
             report_filename = f"forensic_report_{time.strftime('%Y%m%d_%H%M%S')}.pdf"
             report_path = os.path.join(REPORTS_DIR, report_filename)
-            generate_report(results, report_path)
+            # Findings are paged out of the case database; in-memory previews are only a fallback
+            if has_findings():
+                generate_report(load_analysis_results(), report_path, summarize_case_activity())
+            else:
+                generate_report(results, report_path)
             messagebox.showinfo("Report Generated", f"PDF Report saved at:\n{report_path}")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to generate report: {str(e)}")
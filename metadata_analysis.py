@@ -2,56 +2,90 @@ import magic
 import os
 import time
 from datetime import datetime
-import json
+from stream_writers import JSONArrayWriter
+from case_database import CaseWriter
+from scan_rules import NO_RULES, walk_files
+from file_signatures import iter_headers, read_header
 
 # Configuration
 REPORT_FOLDER = "C:\\Users\\sohai\\Desktop\\DF_REPORTS"
 REPORT_PREFIX = "metadata_analysis_report"
 ANALYSIS_TYPE = "Metadata Analysis"
+JSON_EXPORT_FILENAME = "metadata_results.json"
 
-def get_file_metadata(file_path):
-    """Extract metadata for a given file."""
-    metadata = {"File": file_path}
+_mime_detector = None
+
+def get_mime_detector():
+    """Create the libmagic MIME detector once and reuse it for every file."""
+    global _mime_detector
+    if _mime_detector is None:
+        _mime_detector = magic.Magic(mime=True)
+    return _mime_detector
+
+class MetadataRecord:
+    """Compact metadata for a single file; timestamps are kept as epoch floats."""
+    __slots__ = ("path", "size", "mime", "created", "modified", "accessed", "error")
+
+    def __init__(self, path):
+        self.path = path
+        self.size = self.mime = self.created = self.modified = self.accessed = self.error = None
+
+    def as_dict(self):
+        """Return the record in the report's original key layout."""
+        metadata = {"File": self.path}
+        if self.size is not None:
+            metadata["Size (bytes)"] = self.size
+        if self.mime is not None:
+            metadata["MIME Type"] = self.mime
+        if self.created is not None:
+            metadata["Created"] = time.ctime(self.created)
+            metadata["Modified"] = time.ctime(self.modified)
+            metadata["Accessed"] = time.ctime(self.accessed)
+        if self.error is not None:
+            metadata["Error"] = self.error
+        return metadata
+
+def get_file_metadata(file_path, header=None, stats=None, error=None):
+    """Extract metadata for a given file.
+
+    MIME detection runs on the file header, so a header and stat result already read
+    by iter_headers are used as they are; error is the OSError raised reading them.
+    """
+    record = MetadataRecord(file_path)
     try:
-        metadata["Size (bytes)"] = os.path.getsize(file_path)
-        metadata["MIME Type"] = magic.Magic(mime=True).from_file(file_path)
-        metadata["Created"] = time.ctime(os.path.getctime(file_path))
-        metadata["Modified"] = time.ctime(os.path.getmtime(file_path))
-        metadata["Accessed"] = time.ctime(os.path.getatime(file_path))
+        if error is not None:
+            raise error
+        if header is None:
+            header, stats = read_header(file_path)
+        record.mime = get_mime_detector().from_buffer(header)
+        record.size = stats.st_size
+        record.created, record.modified, record.accessed = stats.st_ctime, stats.st_mtime, stats.st_atime
     except FileNotFoundError:
-        metadata["Error"] = "File not found"
+        record.error = "File not found"
     except PermissionError:
-        metadata["Error"] = "Permission denied"
+        record.error = "Permission denied"
     except Exception as e:
-        metadata["Error"] = f"Unexpected error: {e}"
-    return metadata
+        record.error = f"Unexpected error: {e}"
+    return record
 
-def write_metadata_to_txt(report_path, metadata_list):
-    """Write metadata to a human-readable report."""
-    try:
-        with open(report_path, "w", encoding="utf-8") as f:
-            f.write(f"{ANALYSIS_TYPE} Report\n")
-            f.write(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            for data in metadata_list:
-                f.write("[FILE METADATA]\n")
-                for key, value in data.items():
-                    f.write(f"  {key}: {value}\n")
-                f.write("\n")
-    except Exception as e:
-        print(f"[ERROR] Failed to write TXT report: {e}")
+def iter_metadata(directory, rules=NO_RULES):
+    """Yield a MetadataRecord for every file under directory from headers read in parallel batches."""
+    for entry, header, stats, error in iter_headers(walk_files(directory, rules)):
+        yield get_file_metadata(entry.path, header, stats, error)
 
-def send_to_report_generator(results):
-    """Send metadata results to the final PDF report generator."""
-    try:
-        json_path = os.path.join(REPORT_FOLDER, "metadata_results.json")
-        with open(json_path, "w", encoding="utf-8") as jf:
-            json.dump(results, jf, indent=4)
-        print("[INFO] Metadata results sent to report_generator.py")
-    except Exception as e:
-        print(f"[ERROR] Failed to export JSON for report generator: {e}")
+def write_metadata_entry(f, data):
+    """Write one file's metadata block to the human-readable report."""
+    f.write("[FILE METADATA]\n")
+    for key, value in data.items():
+        f.write(f"  {key}: {value}\n")
+    f.write("\n")
 
-def analyze_metadata(directory):
-    """Main function to perform metadata analysis."""
+def analyze_metadata(directory, rules=NO_RULES):
+    """Main function to perform metadata analysis.
+
+    Records are streamed straight into the TXT report and the JSON export for the
+    report generator, so memory use does not grow with the number of files.
+    """
     if not os.path.isdir(directory):
         print(f"[ERROR] Invalid directory: {directory}")
         return
@@ -59,23 +93,38 @@ def analyze_metadata(directory):
     print(f"[INFO] Scanning directory: {directory}")
     os.makedirs(REPORT_FOLDER, exist_ok=True)
 
-    metadata_results = []
-    for root, _, files in os.walk(directory):
-        for file in files:
-            file_path = os.path.join(root, file)
-            result = get_file_metadata(file_path)
-            metadata_results.append(result)
-
-    # Save TXT Report
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     txt_report_path = os.path.join(REPORT_FOLDER, f"{REPORT_PREFIX}_{timestamp}.txt")
-    write_metadata_to_txt(txt_report_path, metadata_results)
+    json_path = os.path.join(REPORT_FOLDER, JSON_EXPORT_FILENAME)
+    error_count = 0
 
-    # Send to report_generator
-    send_to_report_generator(metadata_results)
+    try:
+        with open(txt_report_path, "w", encoding="utf-8") as f, JSONArrayWriter(json_path) as json_writer, \
+                CaseWriter(ANALYSIS_TYPE, scope_root=directory, prune_files=True) as case:
+            f.write(f"{ANALYSIS_TYPE} Report\n")
+            f.write(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+            for record in iter_metadata(directory, rules):
+                data = record.as_dict()
+                write_metadata_entry(f, data)
+                json_writer.write(data)
+                if record.error:
+                    error_count += 1
+                    case.add_finding("ERROR", record.path, record.error)
+                else:
+                    case.add_file(record.path, size=record.size, mime=record.mime, created=record.created,
+                                  modified=record.modified, accessed=record.accessed)
+        print("[INFO] Metadata results sent to report_generator.py")
+    except Exception as e:
+        print(f"[ERROR] Failed to write metadata reports: {e}")
+        return [f"[ERROR] Metadata analysis failed: {e}"]
 
     print(f"[INFO] Report saved to {txt_report_path}")
-    return metadata_results
+    return [
+        f"Files analyzed: {json_writer.count}",
+        f"Files with errors: {error_count}",
+        f"TXT report: {txt_report_path}",
+        f"JSON export: {json_path}",
+    ]
 
 if __name__ == "__main__":
     user_input = input("Enter directory for metadata analysis: ").strip()
@@ -1,50 +1,98 @@
 import os
-import json
 from datetime import datetime
+from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 from reportlab.lib.utils import simpleSplit
+from case_database import ModuleFindings
 
 # === Configuration ===
 REPORT_FOLDER = "C:\\Users\\sohai\\Desktop\\DF_REPORTS"
 FINAL_REPORT_NAME = "final_forensic_report.pdf"
-
-# Define the expected JSON outputs from each module
-ANALYSIS_MODULES = {
-    "File Integrity Checker": "file_integrity_results.json",
-    "Digital Evidence Timeline": "evidence_timeline_results.json",
-    "Suspicious File Detection": "suspicious_files_results.json",
-    "Metadata Analysis": "metadata_analysis_results.json",
-    "Log File Analysis": "log_analysis_results.json",
-    "Disk Image Analysis": "disk_image_results.json",
-    "Artifact Collection": "artifact_results.json"
-}
+TIMELINE_SECTION = "Digital Evidence Timeline"
+CHART_MAX_BARS = 120
+
+# Sections of the report, named after the module each analyzer records in the case database
+ANALYSIS_MODULES = [
+    "File Integrity Checker",
+    "Digital Evidence Timeline",
+    "Suspicious File Detection",
+    "Metadata Analysis",
+    "Log File Analysis",
+    "Disk Image Analysis",
+    "Artifact Collection",
+]
 
 def load_analysis_results():
-    """Load JSON result files from all analysis modules."""
-    combined_results = {}
-    for section, filename in ANALYSIS_MODULES.items():
-        file_path = os.path.join(REPORT_FOLDER, filename)
-        try:
-            if os.path.exists(file_path):
-                with open(file_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    # Convert to flat string list if needed
-                    if isinstance(data, list):
-                        combined_results[section] = [
-                            f"{entry['Type']}: {entry['File Path']} ({entry['Detail']})" if isinstance(entry, dict)
-                            else str(entry) for entry in data
-                        ]
-                    else:
-                        combined_results[section] = [str(data)]
-            else:
-                combined_results[section] = ["[INFO] No data found."]
-        except Exception as e:
-            combined_results[section] = [f"[ERROR] Failed to read {filename}: {e}"]
-    return combined_results
-
-def generate_report(results, report_path):
-    """Generate a well-formatted PDF report summarizing forensic results."""
+    """Return a lazy, paged view of every module's findings in the case database."""
+    return {section: ModuleFindings(section) for section in ANALYSIS_MODULES}
+
+def draw_bar_chart(c, x, y, chart_width, chart_height, title, starts, counts, flagged):
+    """Draw a histogram with anomalous bars in red."""
+    c.setFont("Helvetica-Bold", 10)
+    c.setFillColor(colors.black)
+    c.drawString(x, y + chart_height + 6, title)
+    c.rect(x, y, chart_width, chart_height, stroke=1, fill=0)
+    peak = max(counts) if counts else 0
+    if not peak:
+        return
+
+    bar_width = chart_width / len(counts)
+    for i, count in enumerate(counts):
+        if count:
+            c.setFillColor(colors.red if i in flagged else colors.HexColor("#007acc"))
+            c.rect(x + i * bar_width, y, max(bar_width * 0.9, 0.5), chart_height * count / peak, stroke=0, fill=1)
+
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica", 7)
+    c.drawString(x, y - 9, starts[0].strftime("%Y-%m-%d %H:%M"))
+    c.drawRightString(x + chart_width, y - 9, starts[-1].strftime("%Y-%m-%d %H:%M"))
+    c.drawRightString(x - 3, y + chart_height - 7, str(peak))
+    c.drawRightString(x - 3, y, "0")
+
+def draw_heatmap(c, x, y, cell_size, title, grid):
+    """Draw a weekday x hour-of-day heatmap, darker cells holding more events."""
+    c.setFont("Helvetica-Bold", 10)
+    c.setFillColor(colors.black)
+    c.drawString(x, y + 7 * cell_size + 16, title)
+    peak = max(max(row) for row in grid) or 1
+
+    c.setFont("Helvetica", 7)
+    for hour in range(0, 24, 3):
+        c.drawString(x + hour * cell_size, y + 7 * cell_size + 4, f"{hour:02d}")
+    for day, label in enumerate(("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")):
+        row_y = y + (6 - day) * cell_size
+        c.setFillColor(colors.black)
+        c.drawRightString(x - 3, row_y + 2, label)
+        for hour in range(24):
+            intensity = grid[day][hour] / peak
+            c.setFillColorRGB(1 - intensity, 1 - 0.52 * intensity, 1 - 0.2 * intensity)
+            c.rect(x + hour * cell_size, row_y, cell_size, cell_size, stroke=1, fill=1)
+    c.setFillColor(colors.black)
+
+def draw_activity_page(c, activity, width, height):
+    """Draw timeline activity charts on the current page."""
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(50, height - 50, "Timeline Activity")
+    c.setFont("Helvetica", 10)
+    c.drawString(50, height - 66, f"{activity.event_count} file(s); bucket size {activity.bucket_seconds}s; "
+                                  f"red bars are anomalous bursts")
+
+    chart_y = height - 200
+    for kind in ("modified", "created", "accessed"):
+        starts, counts, flagged = activity.series(kind, CHART_MAX_BARS)
+        draw_bar_chart(c, 80, chart_y, width - 130, 90, f"{kind.capitalize()} times", starts, counts, flagged)
+        chart_y -= 135
+
+    draw_heatmap(c, 80, chart_y - 40, 18, "Modified times by weekday and hour",
+                 activity.heatmap("modified").tolist())
+
+def generate_report(results, report_path, activity=None):
+    """Generate a well-formatted PDF report summarizing forensic results.
+
+    When an ActivitySummary is given, the timeline section shows activity charts and
+    anomalous buckets instead of one row per file.
+    """
     try:
         c = canvas.Canvas(report_path, pagesize=letter)
         width, height = letter
@@ -72,6 +120,13 @@ def generate_report(results, report_path):
         # Space before details
         y_position -= 20
 
+        if activity is not None and activity.event_count:
+            c.showPage()
+            draw_activity_page(c, activity, width, height)
+            c.showPage()
+            y_position = height - 50
+            results = {**results, TIMELINE_SECTION: activity.summary_lines()}
+
         # Detailed Analysis Sections
         for section, lines in results.items():
             if y_position < 100:
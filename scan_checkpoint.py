@@ -0,0 +1,88 @@
+import os
+import json
+import time
+import hashlib
+
+# === Configuration ===
+REPORT_FOLDER = "C:\\Users\\sohai\\Desktop\\DF_REPORTS"
+CHECKPOINT_FOLDER = os.path.join(REPORT_FOLDER, "checkpoints")
+CHECKPOINT_INTERVAL = 30  # Seconds between fsyncs of the journal
+
+
+def checkpoint_path(kind, target):
+    """Return the journal path for one kind of scan over one target directory."""
+    digest = hashlib.sha1(os.path.abspath(target).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(CHECKPOINT_FOLDER, f"{kind}_{digest}.jsonl")
+
+
+def has_checkpoint(kind, target):
+    """Check whether an unfinished scan left a journal behind."""
+    return os.path.exists(checkpoint_path(kind, target))
+
+
+class CheckpointJournal:
+    """Append-only journal of completed paths so an interrupted scan can resume.
+
+    The first line holds scan metadata and every further line one completed path
+    with its result. Writes are buffered and fsynced at most every CHECKPOINT_INTERVAL
+    seconds, so a crash loses at most that much work. The journal is removed once
+    the scan finishes.
+    """
+
+    def __init__(self, kind, target, resume=False, meta=None, interval=CHECKPOINT_INTERVAL):
+        self.path = checkpoint_path(kind, target)
+        self.interval = interval
+        self.meta = meta or {}
+        self.completed = {}
+        os.makedirs(CHECKPOINT_FOLDER, exist_ok=True)
+
+        if resume and os.path.exists(self.path):
+            self._load()
+            self._file = open(self.path, "a", encoding="utf-8")
+        else:
+            self._file = open(self.path, "w", encoding="utf-8")
+            self._file.write(json.dumps({"meta": self.meta}) + "\n")
+            self._sync()
+        self._last_sync = time.monotonic()
+
+    def _load(self):
+        valid_end = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                if "meta" in record:
+                    self.meta = record["meta"]
+                else:
+                    self.completed[record["p"]] = record["r"]
+                valid_end += len(line)
+        # Drop a torn final line left by a crash so new entries start on a clean line
+        with open(self.path, "r+b") as f:
+            f.truncate(valid_end)
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def record(self, path, result):
+        """Mark a path as done; the entry reaches disk with the next batched fsync."""
+        self.completed[path] = result
+        self._file.write(json.dumps({"p": path, "r": result}) + "\n")
+        if time.monotonic() - self._last_sync >= self.interval:
+            self._sync()
+            self._last_sync = time.monotonic()
+
+    def close(self):
+        """Flush outstanding entries and keep the journal for a later resume."""
+        if not self._file.closed:
+            self._sync()
+            self._file.close()
+
+    def finish(self):
+        """Close and delete the journal after the scan completed."""
+        self.close()
+        os.remove(self.path)
@@ -0,0 +1,192 @@
+import os
+import re
+import csv
+import copy
+import fnmatch
+from io_scheduler import get_scheduler
+
+# === Configuration ===
+# Exclusions are opt-in: only suspicious-file detection and log sweeps pass DEFAULT_RULES, trading
+# coverage of these trees for speed; anything could be planted in them, so those reports state what
+# was skipped. Integrity checks, monitoring, collection, metadata and timelines see everything.
+# Directory names pruned during the walk (globs, matched case-insensitively)
+EXCLUDED_DIR_GLOBS = [
+    "site-packages", "dist-packages", "node_modules", "__pycache__",
+    ".git", ".svn", ".hg", ".tox", ".nox", ".mypy_cache", ".pytest_cache", ".ruff_cache",
+    "venv", ".venv",
+]
+# File names skipped without being read (globs, matched case-insensitively)
+EXCLUDED_FILE_GLOBS = ["*.pyc", "*.pyo", "Thumbs.db", ".DS_Store", "desktop.ini"]
+# Regular expressions matched against the full path with forward slashes
+EXCLUDED_PATH_REGEXES = []
+MAX_DEPTH = None  # Directory levels below the scan root to descend; None for unlimited
+MAX_FILE_SIZE = None  # Files larger than this many bytes are skipped; None for unlimited
+
+KNOWN_GOOD_HASH_FILE = "known_good_hashes.txt"  # One SHA-256 per line
+KNOWN_GOOD_CATALOG_FILE = "known_good_catalog.csv"  # NSRL-style rows with file name, size and hash
+
+CATALOG_NAME_COLUMNS = ("filename", "file_name", "name")
+CATALOG_SIZE_COLUMNS = ("filesize", "file_size", "size")
+CATALOG_HASH_COLUMNS = ("sha-256", "sha256")
+
+
+def compile_globs(globs):
+    """Combine glob patterns into one case-insensitive regex, or None when empty."""
+    if not globs:
+        return None
+    return re.compile("|".join(fnmatch.translate(pattern) for pattern in globs), re.IGNORECASE)
+
+
+def load_known_good(hash_file=KNOWN_GOOD_HASH_FILE, catalog_file=KNOWN_GOOD_CATALOG_FILE):
+    """Load known-good SHA-256 hashes and a (file name, size) catalog if the files exist."""
+    hashes = set()
+    catalog = set()
+    if os.path.exists(hash_file):
+        try:
+            with open(hash_file, "r") as f:
+                hashes.update(line.strip().lower() for line in f if line.strip())
+        except Exception as e:
+            print(f"[ERROR] Failed to load known-good hashes: {e}")
+
+    if os.path.exists(catalog_file):
+        try:
+            with open(catalog_file, "r", newline="", encoding="utf-8", errors="ignore") as f:
+                reader = csv.reader(f)
+                header = [name.strip().strip('"').lower() for name in next(reader, [])]
+
+                def column(names):
+                    return next((header.index(name) for name in names if name in header), None)
+
+                name_col, size_col, hash_col = (column(CATALOG_NAME_COLUMNS), column(CATALOG_SIZE_COLUMNS),
+                                                column(CATALOG_HASH_COLUMNS))
+                for row in reader:
+                    if hash_col is not None and hash_col < len(row) and row[hash_col]:
+                        hashes.add(row[hash_col].strip().lower())
+                    if name_col is not None and size_col is not None and max(name_col, size_col) < len(row):
+                        try:
+                            catalog.add((row[name_col].strip().lower(), int(row[size_col])))
+                        except ValueError:
+                            continue
+        except Exception as e:
+            print(f"[ERROR] Failed to load known-good catalog: {e}")
+    return hashes, catalog
+
+
+class ScanRules:
+    """Compiled exclusion rules, walk limits and known-good allowlists shared by every scan."""
+
+    def __init__(self, excluded_dirs=EXCLUDED_DIR_GLOBS, excluded_files=EXCLUDED_FILE_GLOBS,
+                 excluded_paths=EXCLUDED_PATH_REGEXES, max_depth=MAX_DEPTH, max_file_size=MAX_FILE_SIZE,
+                 known_good_hashes=None, known_good_catalog=None):
+        self.dir_regex = compile_globs(excluded_dirs)
+        self.file_regex = compile_globs(excluded_files)
+        self.path_regex = re.compile("|".join(excluded_paths), re.IGNORECASE) if excluded_paths else None
+        self.max_depth = max_depth
+        self.max_file_size = max_file_size
+        if known_good_hashes is None and known_good_catalog is None:
+            known_good_hashes, known_good_catalog = load_known_good()
+        self.known_good_hashes = known_good_hashes or set()
+        self.known_good_catalog = known_good_catalog or set()
+        self.stats = {"pruned_dirs": 0, "excluded_files": 0, "oversized_files": 0, "known_good": 0}
+
+    def run_copy(self):
+        """Return a copy sharing the compiled rules but counting into fresh stats, for one scan."""
+        rules = copy.copy(self)
+        rules.stats = dict.fromkeys(self.stats, 0)
+        return rules
+
+    def excludes_path(self, path):
+        return self.path_regex is not None and self.path_regex.search(path.replace("\\", "/")) is not None
+
+    def is_known_good_hash(self, file_hash):
+        """Check a computed SHA-256 against the allowlist."""
+        if file_hash and file_hash.lower() in self.known_good_hashes:
+            self.stats["known_good"] += 1
+            return True
+        return False
+
+    def may_be_known_good(self, file_path, size):
+        """Check whether hashing the file could clear it against the allowlist.
+
+        Name and size alone never clear a file, since both are trivial to forge; they
+        only narrow down which files are worth hashing when a catalog is loaded.
+        """
+        if not self.known_good_hashes:
+            return False
+        if not self.known_good_catalog:
+            return True
+        return (os.path.basename(file_path).lower(), size) in self.known_good_catalog
+
+    def summary(self):
+        return (f"Pruned directories: {self.stats['pruned_dirs']}, excluded files: {self.stats['excluded_files']}, "
+                f"oversized files: {self.stats['oversized_files']}, known-good files: {self.stats['known_good']}")
+
+
+def _walk_tree(directory, rules):
+    """Yield (directory path, non-directory entries) for every directory kept by the rules."""
+    scheduler = get_scheduler()
+    stack = [(directory, 0)]
+    while stack:
+        current, depth = stack.pop()
+        try:
+            with scheduler.operation():
+                entries = list(os.scandir(current))
+        except OSError as e:
+            print(f"[WARNING] Cannot read directory {current}: {e}")
+            continue
+
+        subdirs = []
+        others = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+                # Like os.walk, symlinks to directories are neither followed nor yielded as files
+                if is_dir and entry.is_symlink():
+                    continue
+            except OSError:
+                continue
+            if is_dir:
+                if ((rules.dir_regex and rules.dir_regex.match(entry.name)) or rules.excludes_path(entry.path)
+                        or (rules.max_depth is not None and depth >= rules.max_depth)):
+                    rules.stats["pruned_dirs"] += 1
+                else:
+                    subdirs.append((entry.path, depth + 1))
+            else:
+                others.append(entry)
+        yield current, others
+
+        # Reverse so subdirectories are visited in listing order
+        stack.extend(reversed(subdirs))
+
+
+def walk_files(directory, rules=None):
+    """Yield os.DirEntry objects for files under directory, pruning excluded trees as it goes.
+
+    Without rules nothing is excluded.
+    """
+    rules = rules or NO_RULES
+    for _, entries in _walk_tree(directory, rules):
+        for entry in entries:
+            if (rules.file_regex and rules.file_regex.match(entry.name)) or rules.excludes_path(entry.path):
+                rules.stats["excluded_files"] += 1
+                continue
+            if rules.max_file_size is not None:
+                try:
+                    if entry.stat().st_size > rules.max_file_size:
+                        rules.stats["oversized_files"] += 1
+                        continue
+                except OSError:
+                    continue
+            yield entry
+
+
+def walk_directories(directory, rules=None):
+    """Yield the path of directory and of every directory below it that the rules keep."""
+    for current, _ in _walk_tree(directory, rules or NO_RULES):
+        yield current
+
+
+DEFAULT_RULES = ScanRules()
+# No exclusions, limits or allowlists
+NO_RULES = ScanRules(excluded_dirs=(), excluded_files=(), excluded_paths=(), max_depth=None, max_file_size=None,
+                     known_good_hashes=set(), known_good_catalog=set())
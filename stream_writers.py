@@ -0,0 +1,30 @@
+import json
+import textwrap
+
+
+class JSONArrayWriter:
+    """Write a JSON array one item at a time so results never need to be held in memory.
+
+    The output matches json.dump(items, f, indent=4) for lists of flat dicts.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._file.write("[")
+        return self
+
+    def write(self, item):
+        self._file.write(",\n" if self.count else "\n")
+        self._file.write(textwrap.indent(json.dumps(item, indent=4), "    "))
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.write("\n]" if self.count else "]")
+        self._file.close()
+        return False
+
@@ -1,14 +1,22 @@
 import os
 import hashlib
 import csv
-import json
 from datetime import datetime
+from stream_writers import JSONArrayWriter
+from case_database import record_findings
+from scan_rules import DEFAULT_RULES, walk_files
+from io_scheduler import get_scheduler
+from file_signatures import classify_header, extension_mismatch, read_header
 
 # === Configuration ===
 REPORT_FOLDER = "C:\\Users\\sohai\\Desktop\\DF_REPORTS"
 CSV_REPORT_PREFIX = "suspicious_file_report"
 JSON_EXPORT_FILENAME = "suspicious_files_results.json"
 HASH_FILE = "suspicious_hashes.txt"
+CASE_MODULE = "Suspicious File Detection"
+HASH_CHUNK_SIZE = 1024 * 1024
+CHECK_SIGNATURES = True  # Flag files whose header contradicts their extension
+SUMMARY_TYPE = "SCAN"  # Closing record stating what the scan rules skipped
 
 # Suspicious file extensions
 SUSPICIOUS_EXTENSIONS = {'.exe', '.bat', '.dll', '.vbs', '.scr', '.js'}
@@ -32,79 +40,133 @@ def calculate_hash(file_path):
     try:
         sha256_hash = hashlib.sha256()
         with open(file_path, 'rb') as f:
-            for chunk in iter(lambda: f.read(4096), b""):
+            for chunk in get_scheduler().iter_chunks(f, HASH_CHUNK_SIZE):
                 sha256_hash.update(chunk)
         return sha256_hash.hexdigest()
     except Exception as e:
         print(f"[ERROR] Could not hash file: {file_path}\nReason: {e}")
         return None
 
-def detect_suspicious_files(directory):
-    """Detect files with suspicious extensions or hashes."""
+class SuspiciousFinding:
+    """Compact record of one suspicious-file hit."""
+    __slots__ = ("type", "path", "detail")
+
+    def __init__(self, finding_type, path, detail):
+        self.type = finding_type
+        self.path = path
+        self.detail = detail
+
+    def as_dict(self):
+        """Return the finding in the report's original key layout."""
+        return {"Type": self.type, "File Path": self.path, "Detail": self.detail}
+
+    def __str__(self):
+        return f"[{self.type}] {self.path} ({self.detail})"
+
+def add_finding_to_case(case, finding):
+    """Store a suspicious-file finding in the case database."""
+    case.add_finding(finding.type, finding.path, finding.detail)
+
+def iter_suspicious_files(directory, rules=DEFAULT_RULES):
+    """Yield a SuspiciousFinding for every extension, signature or hash hit under directory.
+
+    Files are only cleared as known-good by their hash; a catalog name and size match
+    just marks a flagged file as worth hashing. Hashing runs on the shared I/O
+    scheduler's workers. A final SUMMARY_TYPE record lists what the rules skipped.
+    """
+    rules = rules.run_copy()
+
+    def inspect_entry(entry):
+        header = None
+        if CHECK_SIGNATURES:
+            try:
+                header = read_header(entry.path)[0]
+            except OSError:
+                pass
+        ext = os.path.splitext(entry.name)[1].lower()
+        extension_hit = ext in SUSPICIOUS_EXTENSIONS
+        mismatch = extension_mismatch(entry.name, classify_header(header))
+        # Hash when it can confirm a suspicious hash or clear a hit as known-good
+        file_hash = None
+        try:
+            if SUSPICIOUS_HASHES or ((extension_hit or mismatch)
+                                     and rules.may_be_known_good(entry.path, entry.stat().st_size)):
+                file_hash = calculate_hash(entry.path)
+        except OSError:
+            pass
+        return entry, ext, extension_hit, mismatch, file_hash
+
+    # Header read and hashing share one worker per file, so the scheduler's limit holds
+    for entry, ext, extension_hit, mismatch, file_hash in get_scheduler().map(inspect_entry, walk_files(directory, rules)):
+        file_path = entry.path
+        if rules.is_known_good_hash(file_hash):
+            continue
+
+        # Check suspicious extension
+        if extension_hit:
+            yield SuspiciousFinding("EXTENSION", file_path, ext)
+
+        # Check header signature against the extension
+        if mismatch:
+            yield SuspiciousFinding("MISMATCH", file_path, mismatch)
+
+        # Check suspicious hashes
+        if file_hash and file_hash in SUSPICIOUS_HASHES:
+            yield SuspiciousFinding("HASH", file_path, file_hash)
+
+    yield SuspiciousFinding(SUMMARY_TYPE, directory, rules.summary())
+
+def detect_suspicious_files(directory, rules=DEFAULT_RULES):
+    """Detect files with suspicious extensions or hashes.
+
+    Returns a lazy iterator of SuspiciousFinding objects and the scan timestamp;
+    the iterator can only be consumed once.
+    """
     if not os.path.isdir(directory):
         print(f"[ERROR] Directory not found: {directory}")
         return [], None
 
-    suspicious_files = []
-
     print(f"[INFO] Scanning directory: {directory}")
-    for root, _, files in os.walk(directory):
-        for file in files:
-            file_path = os.path.join(root, file)
-            ext = os.path.splitext(file)[1].lower()
-
-            # Check suspicious extension
-            if ext in SUSPICIOUS_EXTENSIONS:
-                suspicious_files.append({
-                    "Type": "EXTENSION",
-                    "File Path": file_path,
-                    "Detail": ext
-                })
-
-            # Check suspicious hashes
-            if SUSPICIOUS_HASHES:
-                file_hash = calculate_hash(file_path)
-                if file_hash and file_hash in SUSPICIOUS_HASHES:
-                    suspicious_files.append({
-                        "Type": "HASH",
-                        "File Path": file_path,
-                        "Detail": file_hash
-                    })
-
-    return suspicious_files, datetime.now().strftime("%Y%m%d_%H%M%S")
-
-def save_to_csv(suspicious_files, timestamp):
-    """Save suspicious files report to CSV."""
+    findings = record_findings(iter_suspicious_files(directory, rules), CASE_MODULE, add_finding_to_case,
+                              scope_root=directory)
+    return findings, datetime.now().strftime("%Y%m%d_%H%M%S")
+
+def save_findings(suspicious_files, timestamp, echo=False):
+    """Write the CSV report and JSON export in a single pass and return the finding count.
+
+    The closing scan summary is written too but not counted as a finding.
+    """
     os.makedirs(REPORT_FOLDER, exist_ok=True)
     csv_path = os.path.join(REPORT_FOLDER, f"{CSV_REPORT_PREFIX}_{timestamp}.csv")
-    
-    try:
-        with open(csv_path, "w", newline="", encoding="utf-8") as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=["Type", "File Path", "Detail"])
-            writer.writeheader()
-            writer.writerows(suspicious_files)
-        print(f"[INFO] CSV report saved: {csv_path}")
-    except Exception as e:
-        print(f"[ERROR] Failed to write CSV file: {e}")
-
-def export_to_report_generator(suspicious_files):
-    """Export JSON results for report generator."""
     json_path = os.path.join(REPORT_FOLDER, JSON_EXPORT_FILENAME)
-    try:
-        with open(json_path, "w", encoding="utf-8") as jf:
-            json.dump(suspicious_files, jf, indent=4)
-        print(f"[INFO] JSON exported for report generator.")
-    except Exception as e:
-        print(f"[ERROR] Failed to export JSON report: {e}")
 
-def print_suspicious_files(suspicious_files):
-    """Display suspicious findings in the terminal."""
-    if not suspicious_files:
-        print("\n[OK] No suspicious files detected.")
+    with open(csv_path, "w", newline="", encoding="utf-8") as csvfile, JSONArrayWriter(json_path) as json_writer:
+        writer = csv.DictWriter(csvfile, fieldnames=["Type", "File Path", "Detail"])
+        writer.writeheader()
+        count = 0
+        for finding in suspicious_files:
+            row = finding.as_dict()
+            writer.writerow(row)
+            json_writer.write(row)
+            if finding.type == SUMMARY_TYPE:
+                if echo:
+                    print(f"[INFO] {finding.detail}")
+                continue
+            if echo and not count:
+                print("\n[WARNING] Suspicious files detected:")
+            count += 1
+            if echo:
+                print(f" - {finding}")
+
+    if not count:
+        # Keep the previous behaviour of not leaving an empty report behind
+        os.remove(csv_path)
+        if echo:
+            print("\n[OK] No suspicious files detected.")
     else:
-        print("\n[WARNING] Suspicious files detected:")
-        for entry in suspicious_files:
-            print(f" - [{entry['Type']}] {entry['File Path']} ({entry['Detail']})")
+        print(f"[INFO] CSV report saved: {csv_path}")
+        print(f"[INFO] JSON exported for report generator.")
+    return count
 
 def main():
     dir_to_scan = input("Enter the directory to scan for suspicious files: ").strip()
@@ -113,12 +175,8 @@ def main():
         return
 
     suspicious_files, timestamp = detect_suspicious_files(dir_to_scan)
-    print_suspicious_files(suspicious_files)
 
-    if suspicious_files:
-        save_to_csv(suspicious_files, timestamp)
-        export_to_report_generator(suspicious_files)
-    else:
+    if not save_findings(suspicious_files, timestamp, echo=True):
         print("[INFO] No report generated as no suspicious files were found.")
 
 if __name__ == "__main__":
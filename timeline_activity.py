@@ -0,0 +1,155 @@
+import time
+from datetime import datetime
+import numpy as np
+from case_database import connect
+
+# === Configuration ===
+BUCKET_SECONDS = 3600  # Histogram bucket width
+CHUNK_SIZE = 1_000_000  # Events converted to NumPy arrays at a time
+ANOMALY_THRESHOLD = 3.5  # Robust z-score above which a bucket is flagged
+MAX_ANOMALIES = 20  # Anomalous buckets listed per timestamp kind
+TIMESTAMP_KINDS = ("created", "modified", "accessed")
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+MAX_ABS_TIMESTAMP = 253402300800  # Epoch seconds past year 9999 are forged or corrupt and are dropped
+CHART_TRIM_SHARE = 0.001  # Share of events at each end of the range left off the chart axis
+
+
+class BucketCounter:
+    """Counts of epoch timestamps per fixed-width bucket, kept sparse so far-apart outliers cost nothing."""
+
+    def __init__(self, bucket_seconds):
+        self.bucket_seconds = bucket_seconds
+        self.keys = np.zeros(0, dtype=np.int64)  # Sorted indices of the buckets holding events
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def add(self, timestamps):
+        if not len(timestamps):
+            return
+        keys, counts = np.unique(np.floor_divide(timestamps, self.bucket_seconds).astype(np.int64),
+                                 return_counts=True)
+        if len(self.keys):
+            keys, inverse = np.unique(np.concatenate((self.keys, keys)), return_inverse=True)
+            counts = np.bincount(inverse, weights=np.concatenate((self.counts, counts)),
+                                 minlength=len(keys)).astype(np.int64)
+        self.keys, self.counts = keys, counts
+
+    def bucket_starts(self):
+        """Return the epoch start of every bucket holding events."""
+        return self.keys * self.bucket_seconds
+
+
+def bucket_datetime(epoch):
+    """Convert an epoch bucket start to a local datetime, clamped to the representable range."""
+    try:
+        return datetime.fromtimestamp(epoch)
+    except (OverflowError, OSError, ValueError):
+        return datetime.max if epoch > 0 else datetime.min
+
+
+def find_anomalies(counts, threshold=ANOMALY_THRESHOLD):
+    """Return indices of buckets whose robust z-score (median/MAD) exceeds threshold."""
+    active = counts[counts > 0]
+    if len(active) < 3:
+        return np.zeros(0, dtype=np.int64)
+    median = np.median(active)
+    mad = np.median(np.abs(active - median))
+    if mad == 0:
+        spread = active.std()
+        if spread == 0:
+            return np.zeros(0, dtype=np.int64)
+        scores = (counts - active.mean()) / spread
+    else:
+        scores = 0.6745 * (counts - median) / mad
+    flagged = np.nonzero(scores > threshold)[0]
+    return flagged[np.argsort(-counts[flagged])]
+
+
+class ActivitySummary:
+    """Histograms, weekday x hour heatmaps and anomalous buckets for each timestamp kind."""
+
+    def __init__(self, bucket_seconds=BUCKET_SECONDS):
+        self.bucket_seconds = bucket_seconds
+        self.event_count = 0
+        self.histograms = {kind: BucketCounter(bucket_seconds) for kind in TIMESTAMP_KINDS}
+        # Heatmaps are derived from hourly counts so local time can be resolved per hour
+        self._hourly = {kind: BucketCounter(3600) for kind in TIMESTAMP_KINDS}
+
+    def add_columns(self, created, modified, accessed):
+        """Add one chunk of timestamps given as equal-length float arrays."""
+        for kind, column in zip(TIMESTAMP_KINDS, (created, modified, accessed)):
+            column = np.asarray(column, dtype=np.float64)
+            column = column[np.isfinite(column)]
+            # A timestomped FILETIME can claim year 30828; such values would not fit a datetime
+            column = column[np.abs(column) < MAX_ABS_TIMESTAMP]
+            self.histograms[kind].add(column)
+            self._hourly[kind].add(column)
+        self.event_count += len(created)
+
+    def heatmap(self, kind):
+        """Return a 7 x 24 array of counts by local weekday (Monday first) and hour."""
+        hourly = self._hourly[kind]
+        grid = np.zeros((7, 24), dtype=np.int64)
+        for start, count in zip(hourly.bucket_starts().tolist(), hourly.counts.tolist()):
+            try:
+                local = time.localtime(start)
+            except (OverflowError, OSError, ValueError):
+                continue
+            grid[local.tm_wday, local.tm_hour] += count
+        return grid
+
+    def anomalies(self, kind):
+        """Return [(bucket start datetime, count)] for the most anomalous buckets."""
+        histogram = self.histograms[kind]
+        starts = histogram.bucket_starts()
+        return [(bucket_datetime(int(starts[i])), int(histogram.counts[i]))
+                for i in find_anomalies(histogram.counts)[:MAX_ANOMALIES]]
+
+    def series(self, kind, max_bars=None):
+        """Return (bar start datetimes, counts, anomalous bar indices), merging buckets down to max_bars.
+
+        The axis spans the buckets between the CHART_TRIM_SHARE tails, so a few stray
+        timestamps decades away do not squash the real activity into one bar.
+        """
+        histogram = self.histograms[kind]
+        keys, counts = histogram.keys, histogram.counts
+        if not len(keys):
+            return [], [], set()
+        cumulative = np.cumsum(counts)
+        first = int(np.searchsorted(cumulative, cumulative[-1] * CHART_TRIM_SHARE, side="right"))
+        last = int(np.searchsorted(cumulative, cumulative[-1] * (1 - CHART_TRIM_SHARE), side="left"))
+        low, span = int(keys[first]), int(keys[last] - keys[first]) + 1
+        factor = -(-span // max_bars) if max_bars else 1
+        bars = (keys[first:last + 1] - low) // factor
+        bar_counts = np.bincount(bars, weights=counts[first:last + 1], minlength=-(-span // factor)).astype(np.int64)
+        flagged = {int((keys[i] - low) // factor) for i in find_anomalies(counts) if first <= i <= last}
+        starts = [bucket_datetime((low + bar * factor) * histogram.bucket_seconds) for bar in range(len(bar_counts))]
+        return starts, bar_counts.tolist(), flagged
+
+    def summary_lines(self):
+        """Describe the activity and its anomalous buckets as report lines."""
+        lines = [f"Events aggregated: {self.event_count} (bucket size {self.bucket_seconds}s)"]
+        for kind in TIMESTAMP_KINDS:
+            grid = self.heatmap(kind)
+            if grid.any():
+                day, hour = np.unravel_index(np.argmax(grid), grid.shape)
+                lines.append(f"{kind.capitalize()}: busiest slot {WEEKDAYS[day]} {hour:02d}:00 ({grid[day, hour]} events)")
+            for start, count in self.anomalies(kind):
+                lines.append(f"[ANOMALY] {kind.capitalize()} burst at {start.strftime('%Y-%m-%d %H:%M')}: {count} events")
+        return lines
+
+
+def summarize_case_activity(bucket_seconds=BUCKET_SECONDS, case_name=None):
+    """Aggregate file timestamps recorded in the case database by the timeline and metadata modules."""
+    summary = ActivitySummary(bucket_seconds)
+    conn = connect(case_name)
+    try:
+        cursor = conn.execute("SELECT created, modified, accessed FROM files WHERE modified IS NOT NULL")
+        while True:
+            rows = cursor.fetchmany(CHUNK_SIZE)
+            if not rows:
+                break
+            chunk = np.array(rows, dtype=np.float64)
+            summary.add_columns(chunk[:, 0], chunk[:, 1], chunk[:, 2])
+    finally:
+        conn.close()
+    return summary
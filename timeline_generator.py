@@ -1,90 +1,156 @@
 import os
 import csv
-import json
+import heapq
+import pickle
+import tempfile
 from datetime import datetime
+from operator import attrgetter
+from stream_writers import JSONArrayWriter
+from case_database import record_findings
+from scan_rules import NO_RULES, walk_files
+from io_scheduler import get_scheduler
 
 # === Configuration ===
 REPORT_FOLDER = "C:\\Users\\sohai\\Desktop\\DF_REPORTS"
 CSV_REPORT_PREFIX = "digital_timeline_report"
 JSON_EXPORT_FILENAME = "timeline_results.json"
-
-def generate_timeline(directory, sort_by="modified"):
-    """Generate a digital evidence timeline from file metadata."""
+CASE_MODULE = "Digital Evidence Timeline"
+SORT_RUN_SIZE = 500_000  # Events sorted in memory before spilling a run to disk
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+class TimelineEvent:
+    """Compact timeline entry; timestamps are kept as epoch floats until written."""
+    __slots__ = ("path", "created", "modified", "accessed")
+
+    def __init__(self, path, created, modified, accessed):
+        self.path = path
+        self.created = created
+        self.modified = modified
+        self.accessed = accessed
+
+    def __reduce__(self):
+        return (TimelineEvent, (self.path, self.created, self.modified, self.accessed))
+
+    def as_dict(self):
+        """Return the event in the report's original key layout."""
+        return {
+            "File": self.path,
+            "Created": datetime.fromtimestamp(self.created).strftime(TIME_FORMAT),
+            "Modified": datetime.fromtimestamp(self.modified).strftime(TIME_FORMAT),
+            "Accessed": datetime.fromtimestamp(self.accessed).strftime(TIME_FORMAT),
+        }
+
+    def __str__(self):
+        event = self.as_dict()
+        return f"{event['File']} | Created: {event['Created']} | Modified: {event['Modified']} | Accessed: {event['Accessed']}"
+
+def stat_event(entry):
+    """Build the TimelineEvent for one directory entry, or None if it cannot be read."""
+    try:
+        with get_scheduler().operation():
+            stats = entry.stat()
+        return TimelineEvent(entry.path, stats.st_ctime, stats.st_mtime, stats.st_atime)
+    except Exception as e:
+        print(f"[ERROR] Failed to process file: {entry.path}\nReason: {e}")
+        return None
+
+def iter_timeline(directory, rules=NO_RULES):
+    """Yield an unsorted TimelineEvent for every file under directory."""
+    for event in get_scheduler().map(stat_event, walk_files(directory, rules)):
+        if event is not None:
+            yield event
+
+def add_event_to_case(case, event):
+    """Store a timeline event's timestamps in the case database's files table."""
+    case.add_file(event.path, created=event.created, modified=event.modified, accessed=event.accessed)
+
+def _read_run(run_file):
+    """Yield the events of one spilled sort run."""
+    run_file.seek(0)
+    while True:
+        try:
+            yield pickle.load(run_file)
+        except EOFError:
+            return
+
+def external_sort(events, key):
+    """Sort events of any count by spilling sorted runs to disk and merging them lazily."""
+    runs = []
+    batch = []
+    try:
+        for event in events:
+            batch.append(event)
+            if len(batch) >= SORT_RUN_SIZE:
+                batch.sort(key=key)
+                run_file = tempfile.TemporaryFile()
+                for item in batch:
+                    pickle.dump(item, run_file, pickle.HIGHEST_PROTOCOL)
+                runs.append(run_file)
+                batch = []
+        batch.sort(key=key)
+
+        if not runs:
+            yield from batch
+            return
+        yield from heapq.merge(*(_read_run(run_file) for run_file in runs), iter(batch), key=key)
+    finally:
+        for run_file in runs:
+            run_file.close()
+
+def generate_timeline(directory, sort_by="modified", rules=NO_RULES):
+    """Generate a digital evidence timeline from file metadata.
+
+    Returns a lazy iterator of TimelineEvent objects in sorted order together with
+    the sort key used; the iterator can only be consumed once.
+    """
     if not os.path.isdir(directory):
         print(f"[ERROR] Directory not found: {directory}")
         return [], None
 
-    timeline = []
-
     print(f"[INFO] Scanning directory: {directory}")
-    for root, _, files in os.walk(directory):
-        for file in files:
-            file_path = os.path.join(root, file)
-            try:
-                stats = os.stat(file_path)
-                created = datetime.fromtimestamp(stats.st_ctime).strftime('%Y-%m-%d %H:%M:%S')
-                modified = datetime.fromtimestamp(stats.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
-                accessed = datetime.fromtimestamp(stats.st_atime).strftime('%Y-%m-%d %H:%M:%S')
-
-                timeline.append({
-                    "File": file_path,
-                    "Created": created,
-                    "Modified": modified,
-                    "Accessed": accessed
-                })
-
-            except Exception as e:
-                print(f"[ERROR] Failed to process file: {file_path}\nReason: {e}")
-
-    if not timeline:
-        print("[INFO] No files found to generate a timeline.")
-        return [], None
 
     # Sorting
     sort_key = sort_by.capitalize()
     if sort_key not in ["Created", "Modified", "Accessed"]:
         sort_key = "Modified"
-    timeline.sort(key=lambda x: x[sort_key])
 
-    return timeline, sort_key
+    events = record_findings(iter_timeline(directory, rules), CASE_MODULE, add_event_to_case,
+                             scope_root=directory, prune_files=True)
+    return external_sort(events, attrgetter(sort_key.lower())), sort_key
+
+
+def print_event(event):
+    """Print a single timeline event to the terminal."""
+    event = event.as_dict()
+    print(f"File     : {event['File']}")
+    print(f"Created  : {event['Created']}")
+    print(f"Modified : {event['Modified']}")
+    print(f"Accessed : {event['Accessed']}")
+    print("-" * 50)
 
 
-def save_to_csv(results, sort_by):
-    """Save timeline results to a CSV file."""
+def save_timeline(results, sort_by, echo=False):
+    """Write the CSV report and JSON export in a single pass and return the event count."""
     os.makedirs(REPORT_FOLDER, exist_ok=True)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     csv_file_path = os.path.join(REPORT_FOLDER, f"{CSV_REPORT_PREFIX}_{timestamp}.csv")
-
-    try:
-        with open(csv_file_path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=["File", "Created", "Modified", "Accessed"])
-            writer.writeheader()
-            writer.writerows(results)
-        print(f"[INFO] CSV timeline saved: {csv_file_path}")
-    except Exception as e:
-        print(f"[ERROR] Could not save CSV report: {e}")
-
-
-def export_to_report_generator(results):
-    """Export results to JSON for report generator."""
     json_path = os.path.join(REPORT_FOLDER, JSON_EXPORT_FILENAME)
-    try:
-        with open(json_path, "w", encoding="utf-8") as jf:
-            json.dump(results, jf, indent=4)
-        print(f"[INFO] JSON exported for report generator.")
-    except Exception as e:
-        print(f"[ERROR] Failed to export timeline to JSON: {e}")
 
+    if echo:
+        print("\nDigital Evidence Timeline:\n" + "-" * 50)
+    with open(csv_file_path, "w", newline="", encoding="utf-8") as f, JSONArrayWriter(json_path) as json_writer:
+        writer = csv.DictWriter(f, fieldnames=["File", "Created", "Modified", "Accessed"])
+        writer.writeheader()
+        for event in results:
+            row = event.as_dict()
+            writer.writerow(row)
+            json_writer.write(row)
+            if echo:
+                print_event(event)
 
-def print_timeline(results):
-    """Print a human-readable timeline to the terminal."""
-    print("\nDigital Evidence Timeline:\n" + "-" * 50)
-    for event in results:
-        print(f"File     : {event['File']}")
-        print(f"Created  : {event['Created']}")
-        print(f"Modified : {event['Modified']}")
-        print(f"Accessed : {event['Accessed']}")
-        print("-" * 50)
+    print(f"[INFO] CSV timeline saved: {csv_file_path}")
+    print(f"[INFO] JSON exported for report generator.")
+    return json_writer.count
 
 
 def main():
@@ -96,12 +162,8 @@ def main():
     sort_by = input("Sort by (created, modified, accessed): ").strip().lower() or "modified"
     results, sort_used = generate_timeline(dir_to_scan, sort_by)
 
-    if results:
-        print_timeline(results)
-        save_to_csv(results, sort_used)
-        export_to_report_generator(results)
-    else:
-        print("[INFO] No timeline data to save.")
+    if not save_timeline(results, sort_used, echo=True):
+        print("[INFO] No files found to generate a timeline.")
 
 
 if __name__ == "__main__":